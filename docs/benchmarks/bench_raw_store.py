@@ -0,0 +1,131 @@
+"""
+Size benchmark for the content-addressed raw store in source/storage.py.
+
+Simulates a month of daily scrapes where postings stay up for several days,
+so most of each day's jobs were already seen. Repeats keep their description
+and highlights but get a fresh "N days ago" and a reshuffled apply-option list,
+as SerpApi returns them. Compares the legacy one-JSON-file-per-day layout with
+packs + manifests, and checks every day rebuilds exactly.
+
+Daily upload counts what CI sends to R2 after a run: the day's new files in
+data/raw plus the whole blob index, which lives in data/state and is
+re-uploaded every run.
+
+Run from the repo root: `python -m docs.benchmarks.bench_raw_store [days] [jobs_per_day]`
+"""
+import gzip
+import json
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from source.storage import open_blob_index, save_raw_jobs, load_raw_jobs
+
+# Zipf-weighted pseudo-English vocabulary: compresses roughly like real job text
+# (about 3x with gzip) rather than like a tiny repeated word list.
+_vocab_rng = random.Random(0)
+WORDS = ["".join(_vocab_rng.choices("etaoinshrdlcumwfgypbvkjxqz", k=_vocab_rng.randint(2, 11)))
+         for _ in range(5000)]
+WEIGHTS = [1 / (rank + 1) for rank in range(len(WORDS))]
+
+
+def text(rng: random.Random, k: int) -> str:
+    return " ".join(rng.choices(WORDS, weights=WEIGHTS, k=k))
+
+
+def new_posting(rng: random.Random, i: int) -> dict:
+    return {
+        "title": f"Data Scientist {i % 211}",
+        "company_name": f"Company {i % 900}",
+        "location": "New York, NY",
+        "via": "via LinkedIn",
+        "share_link": f"https://www.google.com/search?ibp=htl;jobs#htidocid={i}",
+        "thumbnail": f"https://encrypted-tbn0.gstatic.com/images?q=tbn:{i}",
+        "extensions": ["Full-time", "Health insurance"],
+        "detected_extensions": {"schedule_type": "Full-time", "health_insurance": True},
+        "description": text(rng, 520),
+        "job_highlights": [
+            {"title": "Qualifications", "items": [text(rng, 22) for _ in range(6)]},
+            {"title": "Benefits", "items": [text(rng, 14) for _ in range(3)]},
+        ],
+        "apply_options": [{"title": s, "link": f"https://{s.lower()}.com/jobs/{i}"}
+                          for s in ("LinkedIn", "Indeed", "Glassdoor")],
+        "job_id": f"eyJqb2JfdGl0bGUiOi{i:08d}",
+    }
+
+
+def simulate(days: int, per_day: int, new_share: float = 0.35, seed: int = 3):
+    rng = random.Random(seed)
+    live, next_id = [], 0
+    for day in range(days):
+        n_new = per_day if not live else int(per_day * new_share)
+        for _ in range(n_new):
+            live.append((day, new_posting(rng, next_id)))
+            next_id += 1
+        live = [(d, j) for d, j in live if day - d < 14]  # postings stay up ~2 weeks
+        todays = rng.sample(live, min(per_day, len(live)))
+        jobs = []
+        for first_day, job in todays:
+            job = dict(job)
+            job["detected_extensions"] = {**job["detected_extensions"], "posted_at": f"{day - first_day} days ago"}
+            job["extensions"] = [f"{day - first_day} days ago", *job["extensions"]]
+            job["apply_options"] = rng.sample(job["apply_options"], len(job["apply_options"]))
+            jobs.append(job)
+        yield (date(2026, 1, 1) + timedelta(days=day)).isoformat(), jobs
+
+
+def dir_size(path: Path) -> int:
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+
+
+if __name__ == "__main__":
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    per_day = int(sys.argv[2]) if len(sys.argv) > 2 else 150
+    work = Path(tempfile.mkdtemp())
+    legacy_dir, store_dir = work / "legacy", work / "store"
+    legacy_dir.mkdir()
+    index_path = work / "raw_blobs.sqlite"
+    conn = open_blob_index(index_path)
+
+    month = list(simulate(days, per_day))
+    t0 = time.perf_counter()
+    daily_raw, daily_index = [], []
+    for run_date, jobs in month:
+        with (legacy_dir / f"raw_jobs_{run_date}.json").open("w", encoding="utf-8") as f:
+            json.dump(jobs, f, ensure_ascii=False, indent=2)
+        before = dir_size(store_dir) if store_dir.exists() else 0
+        save_raw_jobs(jobs, run_date, index_conn=conn, raw_dir=store_dir)
+        daily_raw.append(dir_size(store_dir) - before)
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")  # as when the run's process exits
+        daily_index.append(index_path.stat().st_size)
+    write_s = time.perf_counter() - t0
+    conn.close()
+
+    t0 = time.perf_counter()
+    for run_date, jobs in month:
+        assert load_raw_jobs(run_date, raw_dir=store_dir) == jobs, run_date
+    read_s = time.perf_counter() - t0
+
+    legacy = dir_size(legacy_dir)
+    legacy_gz = sum(len(gzip.compress(p.read_bytes(), 6)) for p in legacy_dir.iterdir())
+    store = dir_size(store_dir)
+    index = index_path.stat().st_size
+    legacy_daily = legacy / days
+    store_daily = [r + i for r, i in zip(daily_raw, daily_index)]
+    print(f"days={days} jobs_per_day={per_day} total_jobs={days * per_day}")
+    print(f"legacy raw JSON:      {legacy / 2**20:8.2f} MiB")
+    print(f"legacy, gzipped:      {legacy_gz / 2**20:8.2f} MiB  (compression only, no dedup)")
+    print(f"packs + manifests:    {store / 2**20:8.2f} MiB  ({legacy / store:.1f}x smaller)")
+    print(f"  packs:              {dir_size(store_dir / 'blobs') / 2**20:8.2f} MiB")
+    print(f"  manifests:          {dir_size(store_dir / 'manifests') / 2**20:8.2f} MiB")
+    print(f"blob index (state):   {index / 2**20:8.2f} MiB")
+    print(f"blob index growth:    {(daily_index[-1] - daily_index[0]) / max(1, days - 1) / 1024:8.1f} KiB/day")
+    print(f"avg daily upload:     legacy {legacy_daily / 1024:.0f} KiB, "
+          f"store {sum(store_daily) / days / 1024:.0f} KiB "
+          f"(raw {sum(daily_raw) / days / 1024:.0f} KiB + index {sum(daily_index) / days / 1024:.0f} KiB)")
+    print(f"last day's upload:    store {store_daily[-1] / 1024:.0f} KiB "
+          f"(raw {daily_raw[-1] / 1024:.0f} KiB + index {daily_index[-1] / 1024:.0f} KiB)")
+    print(f"write {write_s:.2f}s, rebuild all days {read_s:.2f}s (verified identical)")
@@ -0,0 +1,90 @@
+"""
+Peak-memory benchmark for one large day flowing through
+normalize -> seen upsert -> tagging -> Parquet write.
+
+Run from the repo root:
+    python -m docs.benchmarks.bench_record_memory [n_jobs]
+
+Only calls that exist both before and after JobRecord are used, so the same
+file can be copied into an older checkout for a "before" number (see
+record_memory.md).
+
+Reports the Python-heap peak above the raw input (tracemalloc), Arrow's
+memory-pool peak, and process max RSS.
+"""
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pyarrow as pa
+
+from source.config_loader import load_core_keys, load_skill_taxonomy
+from source.normalize import normalize_batch
+from source.seen_store import open_seen_db, upsert_and_filter_uniques
+from source.skills import build_matchers, tag_batch
+import source.storage as storage
+
+WORDS = ("python sql spark statistics modeling experimentation stakeholders pipelines "
+         "dashboards causal inference product insights forecasting team data").split()
+
+
+def make_raw_jobs(n: int, seed: int = 11) -> list[dict]:
+    rng = random.Random(seed)
+    jobs = []
+    for i in range(n):
+        jobs.append({
+            "title": f"Data Scientist {i % 97}",
+            "company_name": f"Company {i % 1500}",
+            "location": "New York, NY",
+            "via": "via LinkedIn",
+            "share_link": f"https://www.google.com/search?ibp=htl;jobs#{i}",
+            "thumbnail": f"https://encrypted-tbn0.gstatic.com/images?q={i}",
+            "extensions": ["2 days ago", "Full-time", "Health insurance"],
+            "detected_extensions": {"posted_at": "2 days ago", "schedule_type": "Full-time", "health_insurance": True},
+            "description": " ".join(rng.choices(WORDS, k=650)),
+            "job_highlights": [
+                {"title": "Qualifications", "items": [" ".join(rng.choices(WORDS, k=20)) for _ in range(6)]},
+                {"title": "Responsibilities", "items": [" ".join(rng.choices(WORDS, k=20)) for _ in range(6)]},
+            ],
+            "apply_options": [{"title": "LinkedIn", "link": f"https://linkedin.com/jobs/{i}"},
+                              {"title": "Indeed", "link": f"https://indeed.com/jobs/{i}"}],
+            "job_id": f"eyJqb2JfdGl0bGUiOi{i:08d}",
+        })
+    return jobs
+
+
+def main(n: int):
+    core_keys = load_core_keys()
+    matchers = build_matchers(load_skill_taxonomy())
+    workdir = tempfile.mkdtemp()
+    storage.PROCESSED_DIR = storage.Path(workdir) / "processed"
+
+    raw_jobs = make_raw_jobs(n)
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    t0 = time.perf_counter()
+
+    normalized = normalize_batch(raw_jobs, core_keys, "2026-01-01")
+    conn = open_seen_db(os.path.join(workdir, "seen.sqlite"))
+    uniques = upsert_and_filter_uniques(conn, normalized, "2026-01-01")[0]  # 2- or 3-tuple by version
+    tag_batch(uniques, matchers)
+    storage.save_processed_parquet(uniques, "2026-01-01")
+
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    print(f"jobs={n} elapsed={elapsed:.2f}s")
+    print(f"python_heap_peak_above_raw={(peak - base) / 2**20:.1f} MiB")
+    print(f"arrow_pool_peak={pa.default_memory_pool().max_memory() / 2**20:.1f} MiB")
+    print(f"max_rss={rss_mb:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
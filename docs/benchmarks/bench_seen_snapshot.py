@@ -0,0 +1,81 @@
+"""
+Lookup benchmark for the memory-mapped seen-key snapshot in source/seen_store.py.
+
+Fills a seen DB with N job keys, exports the snapshot, then checks a batch of
+keys (half seen, half new) three ways: chunked `IN (...)` queries against
+SQLite (`select_seen`), the same against a freshly opened connection (what a
+separate analytics/backfill process pays), and `SeenSnapshot.contains_many`.
+All three must return the same set.
+
+Run from the repo root: `python -m docs.benchmarks.bench_seen_snapshot [seen_keys] [batch]`
+"""
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from source.seen_store import SeenSnapshot, _key_digest, export_seen_snapshot, open_seen_db, select_seen
+
+
+def job_key(i: int) -> str:
+    return f"id:eyJqb2JfdGl0bGUiOi{i:010d}"
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - t0
+
+
+if __name__ == "__main__":
+    n_seen = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    batch = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    work = Path(tempfile.mkdtemp())
+    db_path, snap_path = work / "seen_jobs.sqlite", work / "seen_keys.bin"
+
+    conn = open_seen_db(db_path)
+    with conn:
+        conn.executemany(
+            "INSERT INTO job_seen(job_key, first_seen, last_seen) VALUES (?, '2026-01-01', '2026-01-01')",
+            ((job_key(i),) for i in range(n_seen)),
+        )
+
+    _, export_s = timed(export_seen_snapshot, conn, snap_path)
+
+    rng = random.Random(7)
+    queries = [job_key(rng.randrange(2 * n_seen)) for _ in range(batch)]
+
+    expected, warm_s = timed(select_seen, conn, queries)
+    conn.close()
+
+    def cold_sqlite(keys):
+        c = open_seen_db(db_path)
+        try:
+            return select_seen(c, keys)
+        finally:
+            c.close()
+
+    cold, cold_s = timed(cold_sqlite, queries)
+
+    def snapshot(keys):
+        with SeenSnapshot(snap_path) as snap:
+            return snap.contains_many(keys)
+
+    found, snap_s = timed(snapshot, queries)
+    assert found == expected == cold, "snapshot and SQLite disagree"
+
+    snap, open_s = timed(SeenSnapshot, snap_path)
+    _, hit_s = timed(snap.contains_many, queries)
+    snap.close()
+    _, digest_s = timed(lambda keys: [_key_digest(k) for k in keys], queries)
+
+    print(f"seen_keys={n_seen} batch={batch} hits={len(expected)}")
+    print(f"db size:              {db_path.stat().st_size / 2**20:8.1f} MiB")
+    print(f"snapshot size:        {snap_path.stat().st_size / 2**20:8.1f} MiB  (export {export_s:.2f}s)")
+    print(f"select_seen, open conn:      {warm_s * 1000:8.1f} ms")
+    print(f"select_seen, new conn:       {cold_s * 1000:8.1f} ms")
+    print(f"SeenSnapshot open + lookup:  {snap_s * 1000:8.1f} ms")
+    print(f"  open (mmap + header):      {open_s * 1000:8.1f} ms")
+    print(f"  contains_many:             {hit_s * 1000:8.1f} ms  ({hit_s / batch * 1e6:.2f} us/key)")
+    print(f"    of which key hashing:    {digest_s * 1000:8.1f} ms")
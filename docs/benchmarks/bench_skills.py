@@ -0,0 +1,69 @@
+"""
+Throughput benchmark for source/skills.py.
+
+Generates synthetic postings with realistic description length and compares:
+  - naive: one compiled regex per taxonomy alias, run over every record
+  - trie:  source.skills.tag_batch (single merged matcher)
+  - trie, N processes: source.skills.tag_batch_parallel
+
+Run from the repo root: `python -m docs.benchmarks.bench_skills [n_records]`
+"""
+import random
+import re
+import sys
+import time
+
+from source.config_loader import load_skill_taxonomy
+from source.skills import CONTEXT_KEY, build_matchers, tag_batch, tag_batch_parallel
+
+FILLER = (
+    "we are looking for a curious and driven team member to join our growing analytics group "
+    "you will partner with product engineering and business stakeholders to deliver insights "
+    "and build models that drive decisions across the company in a fast paced environment"
+).split()
+
+
+def make_records(n: int, taxonomy: dict, seed: int = 7) -> list[dict]:
+    rng = random.Random(seed)
+    aliases = [a for cat, tags in taxonomy.items() if cat != CONTEXT_KEY for al in tags.values() for a in al]
+    records = []
+    for i in range(n):
+        words = rng.choices(FILLER, k=600) + rng.sample(aliases, 12) + [f"{rng.randint(1, 8)}+ years"]
+        rng.shuffle(words)
+        records.append({
+            "title": rng.choice(["Senior Data Scientist", "Data Scientist", "Staff Data Scientist, ML", "Data Science Intern"]),
+            "description_raw": " ".join(words),
+            "job_highlights_raw": [{"title": "Qualifications", "items": [" ".join(rng.sample(aliases, 4))]}],
+        })
+    return records
+
+
+def naive_tag(records: list[dict], taxonomy: dict):
+    patterns = [
+        (re.compile(r"(?<![\w+#])" + re.escape(a.lower()) + r"(?![\w+#])"), cat, tag)
+        for cat, tags in taxonomy.items() if cat != CONTEXT_KEY for tag, al in tags.items() for a in al
+    ]
+    for rec in records:
+        text = rec["description_raw"].lower()
+        rec["naive"] = {(cat, tag) for p, cat, tag in patterns if p.search(text)}
+
+
+def timed(label: str, n: int, fn):
+    t0 = time.perf_counter()
+    fn()
+    dt = time.perf_counter() - t0
+    print(f"{label:<28} {dt:8.2f}s  {n / dt:10,.0f} records/s")
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    taxonomy = load_skill_taxonomy()
+    matchers = build_matchers(taxonomy)
+    records = make_records(n, taxonomy)
+    avg_len = sum(len(r["description_raw"]) for r in records) / n
+    print(f"records={n} avg_description_chars={avg_len:,.0f}")
+
+    timed("naive (regex per alias)", n, lambda: naive_tag(records, taxonomy))
+    timed("trie matcher, 1 process", n, lambda: tag_batch(records, matchers))
+    for procs in (2, 4):
+        timed(f"trie matcher, {procs} processes", n, lambda: tag_batch_parallel(records, taxonomy, procs))
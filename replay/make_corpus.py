@@ -0,0 +1,184 @@
+"""
+Generate the synthetic replay corpus in replay/corpus.json.gz.
+
+Stands in for recorded SerpApi pages (real recordings can be built from
+data/raw with `python -m source.replay --from-raw START END`). Seeded, so
+rerunning it reproduces the committed file byte for byte.
+
+Covers what the pipeline has to get right across days:
+- postings that stay up for several days and are re-seen daily, with SerpApi's
+  daily noise (fresh "N days ago", reshuffled apply options);
+- real revisions (salary, description, new apply option) for change capture;
+- postings without job_id, and a duplicate across pages of the same day;
+- short days (pagination ends before the cap: carryover) and long days (cap binds);
+- a month boundary (quota reset), an empty first page, a mid-scrape network
+  failure (unbilled connect error, or a billed read timeout) followed by a
+  same-day rerun, and a plain same-day rerun;
+- one day with thousands of postings, so slow or memory-hungry scaling shows;
+- same-day reruns on a fresh CI runner (only data/state synced down), after a
+  failed and after a complete first run, which must not clobber the first
+  run's uploaded raw packs or changes.
+
+Run from the repo root: `python replay/make_corpus.py`
+"""
+import gzip
+import json
+import random
+from datetime import date, timedelta
+from pathlib import Path
+
+OUT = Path(__file__).resolve().parent / "corpus.json.gz"
+
+START = date(2026, 1, 22)
+DAYS = 19
+JOBS_PER_PAGE = 10
+
+KEYWORDS = [
+    "Python", "SQL", "PyTorch", "Spark", "AWS", "Tableau", "pandas", "scikit-learn",
+    "machine learning", "causal inference", "A/B testing", "time series", "LLMs",
+    "statistics", "dbt", "Airflow", "PhD", "Master's degree", "3+ years", "5+ years",
+]
+LEVELS = ["", "Senior ", "Staff ", "Lead ", "Junior ", "Principal "]
+ROLES = ["Data Scientist", "Machine Learning Engineer", "Data Analyst", "Applied Scientist"]
+SOURCES = ["LinkedIn", "Indeed", "Glassdoor", "ZipRecruiter", "Built In NYC"]
+LOCATIONS = ["New York, NY", "Brooklyn, NY", "Jersey City, NJ", "Anywhere"]
+
+# Special days, by offset from START.
+EMPTY_FIRST_PAGE = {9}
+FAILING_RUN = {5: 2, 15: 3}    # day offset -> page that raises on the first run
+READ_TIMEOUT = {15}            # that failure is a billed read timeout, not a connect error
+PLAIN_RERUN = {12, 16}
+# A scaling check: this day lists thousands of postings on a few oversized
+# pages (SerpApi serves 10 per page), so one run pushes them all through
+# normalize, dedup, tagging and storage. Several times storage's 2,000-row
+# Parquet batch, so whole-day materialization shows up in the memory ceilings.
+# Its postings get shorter text to keep the committed corpus small.
+LARGE_DAY = {18: (12000, 8)}   # day offset -> (jobs listed, pages)
+LARGE_DAY_WORDS = 25
+FRESH_RUNNER_RERUN = {15, 16}  # the rerun starts on a new runner
+
+_vocab_rng = random.Random(0)
+WORDS = ["".join(_vocab_rng.choices("etaoinshrdlcumwfgypbvkjxqz", k=_vocab_rng.randint(2, 9)))
+         for _ in range(1500)]
+WEIGHTS = [1 / (rank + 1) for rank in range(len(WORDS))]
+
+
+def text(rng: random.Random, k: int) -> str:
+    words = rng.choices(WORDS, weights=WEIGHTS, k=k)
+    for _ in range(3):
+        words.insert(rng.randrange(len(words)), rng.choice(KEYWORDS))
+    return " ".join(words)
+
+
+def new_posting(rng: random.Random, i: int, words: int = 90) -> dict:
+    company = f"Company {rng.randrange(120)}"
+    job = {
+        "title": f"{rng.choice(LEVELS)}{rng.choice(ROLES)}",
+        "company_name": company,
+        "location": rng.choice(LOCATIONS),
+        "via": f"via {rng.choice(SOURCES)}",
+        "share_link": f"https://www.google.com/search?ibp=htl;jobs&q=data+scientist#htidocid=r{i}",
+        "thumbnail": f"https://encrypted-tbn0.gstatic.com/images?q=tbn:r{i}",
+        "extensions": ["Full-time"],
+        "detected_extensions": {"schedule_type": "Full-time"},
+        "description": text(rng, words),
+        "job_highlights": [
+            {"title": "Qualifications", "items": [text(rng, max(3, words // 9)) for _ in range(3)]},
+        ],
+        "apply_options": [
+            {"title": s, "link": f"https://{s.lower().replace(' ', '')}.com/jobs/r{i}"}
+            for s in rng.sample(SOURCES, rng.randint(1, 3))
+        ],
+        "job_id": f"eyJqb2JfdGl0bGUiOiJyZXBsYXkiLCJpZCI6{i:06d}",
+    }
+    if rng.random() < 0.3:
+        salary = f"{rng.randrange(110, 220)}K–{rng.randrange(220, 320)}K a year"
+        job["detected_extensions"]["salary"] = salary
+        job["extensions"].append(salary)
+    if rng.random() < 0.08:
+        del job["job_id"]  # keyed by description fingerprint instead
+    return job
+
+
+def revise(rng: random.Random, job: dict):
+    """Apply one real content change to a live posting."""
+    kind = rng.choice(["salary", "description", "apply"])
+    if kind == "salary":
+        job["detected_extensions"]["salary"] = f"{rng.randrange(120, 240)}K–{rng.randrange(240, 340)}K a year"
+    elif kind == "description" and "job_id" in job:
+        job["description"] += " " + text(rng, 12)
+    else:
+        source = rng.choice(SOURCES)
+        job["apply_options"].append({"title": source, "link": f"https://{source.lower().replace(' ', '')}.com/r/{rng.random():.6f}"})
+
+
+def page(jobs: list[dict], token: str | None) -> dict:
+    out = {"search_metadata": {"status": "Success"}, "jobs_results": jobs}
+    if token:
+        out["serpapi_pagination"] = {"next_page_token": token}
+    return out
+
+
+def build() -> dict:
+    rng = random.Random(42)
+    live, next_id, days = [], 0, []
+    for offset in range(DAYS):
+        day = START + timedelta(days=offset)
+        n_new = LARGE_DAY[offset][0] if offset in LARGE_DAY else rng.randint(10, 28)
+        words = LARGE_DAY_WORDS if offset in LARGE_DAY else 90
+        for _ in range(n_new):
+            live.append({"first": offset, "lifetime": rng.randint(3, 12), "job": new_posting(rng, next_id, words)})
+            next_id += 1
+        live = [p for p in live if offset - p["first"] < p["lifetime"]]
+        for p in live:
+            if offset > p["first"] and rng.random() < 0.06:
+                revise(rng, p["job"])
+
+        listed = sorted(live, key=lambda p: (-p["first"], rng.random()))
+        jobs = []
+        n_listed = LARGE_DAY[offset][0] if offset in LARGE_DAY else rng.randint(2, 9) * JOBS_PER_PAGE
+        for p in listed[:n_listed]:
+            job = json.loads(json.dumps(p["job"]))
+            age = offset - p["first"]
+            posted = f"{age} days ago" if age else f"{rng.randint(1, 20)} hours ago"
+            job["detected_extensions"] = {"posted_at": posted, **job["detected_extensions"]}
+            job["extensions"] = [posted, *job["extensions"]]
+            rng.shuffle(job["apply_options"])
+            jobs.append(job)
+        if offset % 4 == 1 and len(jobs) > JOBS_PER_PAGE:
+            jobs.insert(JOBS_PER_PAGE + 3, jobs[2])  # same posting again on the next page
+
+        per_page = -(-len(jobs) // LARGE_DAY[offset][1]) if offset in LARGE_DAY else JOBS_PER_PAGE
+        chunks = [jobs[i:i + per_page] for i in range(0, len(jobs), per_page)]
+        if offset in EMPTY_FIRST_PAGE:
+            chunks = [[]]
+        pages = [
+            page(chunk, f"{day.isoformat()}#{i + 1}" if i + 1 < len(chunks) else None)
+            for i, chunk in enumerate(chunks)
+        ]
+
+        runs = [{}]
+        if offset in FAILING_RUN:
+            runs = [{"fail_at_page": FAILING_RUN[offset]}, {}]
+            if offset in READ_TIMEOUT:
+                runs[0]["fail_with"] = "read_timeout"
+        elif offset in PLAIN_RERUN:
+            runs = [{}, {}]
+        if offset in FRESH_RUNNER_RERUN:
+            runs[-1] = {"fresh_runner": True}
+        days.append({"date": day.isoformat(), "pages": pages, "runs": runs})
+
+    return {
+        "version": 1,
+        "account": {"searches_per_month": 250, "this_month_usage": 170},
+        "days": days,
+    }
+
+
+if __name__ == "__main__":
+    payload = json.dumps(build(), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    with OUT.open("wb") as f:
+        # mtime=0 keeps the gzip header (and so the file) reproducible
+        with gzip.GzipFile(fileobj=f, mode="wb", compresslevel=9, mtime=0) as gz:
+            gz.write(payload)
+    print(f"Wrote {OUT} ({OUT.stat().st_size / 1024:.0f} KiB, {len(payload) / 1024:.0f} KiB raw)")
@@ -43,6 +43,23 @@ def load_core_keys(path: str | Path = CONFIG_DIR / "normalize_schema.json") -> l
         raise
 
 
+def load_skill_taxonomy(path: str | Path = CONFIG_DIR / "skills_taxonomy.yaml") -> dict[str, dict[str, list[str]]]:
+    """Load the skill/tool/seniority taxonomy used for keyword tagging."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            taxonomy = yaml.safe_load(f) or {}
+        categories = {c: tags for c, tags in taxonomy.items() if c != "contexts"}
+        n_tags = sum(len(tags) for tags in categories.values())
+        logger.info(f"Loaded {n_tags} taxonomy tags in {len(categories)} categories from {path}")
+        return taxonomy
+    except FileNotFoundError:
+        logger.exception(f"Skill taxonomy not found: {path}")
+        raise
+    except yaml.YAMLError as e:
+        logger.exception(f"YAML parsing error in skill taxonomy: {e}")
+        raise
+
+
 def get_serpapi_key(env_var: str = "SERPAPI_KEY") -> str:
     """Read the API key from environment variable."""
     key = os.getenv(env_var)
@@ -2,6 +2,7 @@ import hashlib
 import re
 
 from source.logger import get_logger
+from source.records import JobRecord
 
 logger = get_logger()
 
@@ -44,8 +45,8 @@ def _make_job_key(
     comp_hash = hashlib.md5(comp.encode("utf-8")).hexdigest()
     return f"cmp:{comp_hash}"
 
-def _normalize_job(job: dict, core_keys: list[str], scrape_date: str) -> dict:
-    """Convert one raw SerpApi job record into a standardized dictionary."""
+def _normalize_job(job: dict, core_keys: set[str], scrape_date: str) -> JobRecord:
+    """Convert one raw SerpApi job record into a standardized JobRecord."""
     job_id = job.get("job_id")
     title = _clean_text(job.get("title"))
     company = _clean_text(job.get("company_name"))
@@ -65,34 +66,35 @@ def _normalize_job(job: dict, core_keys: list[str], scrape_date: str) -> dict:
     job_highlights_raw = job.get("job_highlights") or []
     apply_options_raw = job.get("apply_options") or []
     
-    extras = {key: value for key, value in job.items() if key not in set(core_keys)}
+    extras = {key: value for key, value in job.items() if key not in core_keys}
     job_key = _make_job_key(job_id, title, company, location, description_raw)
 
-    return {
-        "scrape_date": scrape_date,
-        "job_id": job_id,
-        "job_key": job_key,
-        "title": title,
-        "company": company,
-        "location": location,
-        "via": via,
-        "google_share_url": google_share_url,
-        "thumbnail": thumbnail,
-        "posted_at_raw": posted_at_raw,
-        "job_metadata_raw": job_metadata_raw,   
-        "job_highlights_raw": job_highlights_raw,
-        "description_raw": description_raw,     
-        "apply_options_raw": apply_options_raw, 
-        "extras": extras
-    }
+    return JobRecord(
+        scrape_date=scrape_date,
+        job_id=job_id,
+        job_key=job_key,
+        title=title,
+        company=company,
+        location=location,
+        via=via,
+        google_share_url=google_share_url,
+        thumbnail=thumbnail,
+        posted_at_raw=posted_at_raw,
+        job_metadata_raw=job_metadata_raw,
+        job_highlights_raw=job_highlights_raw,
+        description_raw=description_raw,
+        apply_options_raw=apply_options_raw,
+        extras=extras,
+    )
     
-def normalize_batch(raw_jobs: list[dict], core_keys: list[str], scrape_date: str) -> list[dict]:
+def normalize_batch(raw_jobs: list[dict], core_keys: list[str], scrape_date: str) -> list[JobRecord]:
     """Normalize a batch of raw SerpApi job dicts into standardized records."""
+    core_keys = set(core_keys)
     records = []
     for job in raw_jobs:
         try:
             record = _normalize_job(job, core_keys, scrape_date)
-            if record["title"] and record["company"]:
+            if record.title and record.company:
                 records.append(record)
             else:
                 logger.info("Dropped record without title or company")
@@ -0,0 +1,61 @@
+class JobRecord:
+    """
+    One normalized job posting.
+
+    A `__slots__` class shared by normalize, seen_store, skills, search_index
+    and storage: records are created once in `normalize_batch` and passed by
+    reference through dedup, tagging and the Parquet writer (no per-stage
+    dict copies). `get`/`[]` keep dict-style reads working for helpers that
+    also accept plain dicts (e.g. rows read back from Parquet).
+    """
+
+    __slots__ = (
+        "scrape_date",
+        "job_id",
+        "job_key",
+        "title",
+        "company",
+        "location",
+        "via",
+        "google_share_url",
+        "thumbnail",
+        "posted_at_raw",
+        "job_metadata_raw",
+        "job_highlights_raw",
+        "description_raw",
+        "apply_options_raw",
+        "extras",
+        # filled by source.skills.tag_batch
+        "skills",
+        "tools",
+        "degrees",
+        "seniority",
+        "experience_years_min",
+    )
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.pop(name, None))
+        if fields:
+            raise TypeError(f"Unknown JobRecord fields: {sorted(fields)}")
+
+    def get(self, key: str, default=None):
+        return getattr(self, key, default) if key in FIELDS else default
+
+    def __getitem__(self, key: str):
+        if key not in FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def update(self, fields: dict):
+        for key, value in fields.items():
+            setattr(self, key, value)
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f"JobRecord(job_key={self.job_key!r}, title={self.title!r}, company={self.company!r})"
+
+
+FIELDS = frozenset(JobRecord.__slots__)
@@ -0,0 +1,403 @@
+from pathlib import Path
+from datetime import date, timedelta
+from unittest import mock
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+import zlib
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import requests
+
+from source import runner
+from source.account import ACCOUNT_URL
+from source.logger import get_logger
+from source.scraper import ENDPOINT
+from source.search_index import DEFAULT_SEARCH_DB, open_search_db
+from source.seen_store import DEFAULT_SEEN_DB
+from source.storage import (
+    RAW_DIR,
+    PROCESSED_DIR,
+    PARQUET_TEMPLATE,
+    CHANGES_DIR,
+    load_changes,
+    load_raw_jobs,
+)
+from source.summary import SUMMARY_JSON
+
+logger = get_logger()
+
+REPLAY_DIR = Path(__file__).resolve().parents[1] / "replay"
+DEFAULT_CORPUS = REPLAY_DIR / "corpus.json.gz"
+DEFAULT_GOLDEN = REPLAY_DIR / "golden.json"
+
+# Each simulated day (all runs of that date) must stay within `factor` times
+# the performance recorded in the golden file, or under the floor for days too
+# small to measure reliably. Stored in the golden file; these are the defaults.
+DEFAULT_LIMITS = {"factor": 2.5, "min_wall_s": 0.5, "min_peak_mib": 1.0, "min_arrow_mib": 1.0}
+# (key, label, unit, floor): wall time; Python heap peak (tracemalloc); and the
+# Arrow memory pool's high-water mark, which tracemalloc does not see. Arrow
+# cannot reset it per run, so it is process-wide and only grows: the first day
+# over its ceiling is the one that allocated too much. It is sampled right
+# after each run, and the harness reads Parquet back in small batches so its
+# own allocations stay below the pipeline's.
+DIGEST_BATCH_ROWS = 256
+PERF_METRICS = [
+    ("wall_s", "wall time", "s", "min_wall_s"),
+    ("peak_mib", "Python heap peak", " MiB", "min_peak_mib"),
+    ("arrow_mib", "Arrow pool high-water mark", " MiB", "min_arrow_mib"),
+]
+
+SUMMARY_FIELDS = [
+    "cap", "requests_used", "stop_reason", "total_jobs", "normalized",
+    "uniques", "changed", "total_seen", "carryover", "remaining_after",
+]
+JOBS_PER_PAGE = 10
+
+# Stand-in for the R2 bucket: after every run the outputs the daily workflow
+# uploads are copied here (overwriting, like `aws s3 sync`), and all output
+# checks read from here. A run with "fresh_runner" starts with only data/state,
+# as a new CI runner does.
+REMOTE_DIR = Path("remote")
+SYNCED_DIRS = (RAW_DIR, PROCESSED_DIR)
+
+
+class _Response:
+    status_code = 200
+    ok = True
+
+    def __init__(self, payload: dict):
+        self._payload = payload
+
+    def json(self) -> dict:
+        return self._payload
+
+    def raise_for_status(self):
+        pass
+
+
+class SerpApiStub:
+    """
+    Stands in for `requests.get` during a replay: serves the simulated day's
+    recorded search pages and an /account endpoint whose usage grows with every
+    search served and resets when the simulated month changes. A run's
+    "fail_at_page" fails that page once: by default before reaching the server
+    (unbilled), or with "fail_with": "read_timeout" after the search was billed.
+    """
+
+    def __init__(self, corpus: dict):
+        self.quota = corpus["account"]["searches_per_month"]
+        self.used = corpus["account"]["this_month_usage"]
+        self.month = None
+        self.day = None
+        self.fail_at = None
+        self.fail_with = None
+
+    def start_run(self, day: dict, run: dict):
+        month = day["date"][:7]
+        if self.month is not None and month != self.month:
+            self.used = 0
+        self.month = month
+        self.day = day
+        self.fail_at = run.get("fail_at_page")
+        self.fail_with = run.get("fail_with", "connect")
+
+    def get(self, url: str, params: dict | None = None, timeout: float | None = None) -> _Response:
+        if url == ACCOUNT_URL:
+            return _Response({
+                "searches_per_month": self.quota,
+                "plan_searches_left": max(0, self.quota - self.used),
+                "this_month_usage": self.used,
+            })
+        if url != ENDPOINT:
+            raise AssertionError(f"Unexpected HTTP request during replay: {url}")
+
+        token = (params or {}).get("next_page_token")
+        idx = int(token.rsplit("#", 1)[1]) if token else 0
+        if self.fail_at == idx + 1:
+            self.fail_at = None
+            if self.fail_with == "read_timeout":
+                self.used += 1  # the search ran and was billed; the response never arrived
+                raise requests.exceptions.ReadTimeout(f"replay: simulated read timeout on page {idx + 1}")
+            raise requests.exceptions.ConnectTimeout(f"replay: simulated connect failure on page {idx + 1}")
+        self.used += 1
+        return _Response(self.day["pages"][idx])
+
+
+def load_corpus(path: str | Path = DEFAULT_CORPUS) -> dict:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+def _digest(obj) -> str:
+    payload = json.dumps(obj, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()[:16]
+
+def _parquet_digest(path: Path) -> str | None:
+    """Hash of a Parquet file's rows (not its bytes, which embed the writer version)."""
+    if not path.exists():
+        return None
+    rows = []
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=DIGEST_BATCH_ROWS):
+        rows.extend(batch.to_pylist())
+    return _digest(rows)
+
+def _query_digest(db_path: str, sql: str) -> str | None:
+    if not Path(db_path).exists():
+        return None
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        return _digest(conn.execute(sql).fetchall())
+    finally:
+        conn.close()
+
+def _sync_up():
+    for src_dir in SYNCED_DIRS:
+        for src in src_dir.rglob("*"):
+            if src.is_file() and src.suffix != ".tmp":
+                dst = REMOTE_DIR / src
+                dst.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(src, dst)
+
+def _fresh_runner():
+    for path in Path("data").iterdir():
+        if path.name == "state":
+            continue
+        if path.is_dir():
+            shutil.rmtree(path)
+        else:
+            path.unlink()
+
+def _raw_digest(run_date: str) -> str | None:
+    try:
+        return _digest(load_raw_jobs(run_date, raw_dir=REMOTE_DIR / RAW_DIR))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, zlib.error) as e:
+        return f"unreadable: {type(e).__name__}: {e}"
+
+def _observe(run_date: str, run: int) -> dict:
+    """Collect one run's outputs (as uploaded to REMOTE_DIR) as comparable values."""
+    summary = {}
+    if SUMMARY_JSON.exists():
+        with SUMMARY_JSON.open("r", encoding="utf-8") as f:
+            summary = json.load(f)
+    changes = load_changes(run_date, changes_dir=REMOTE_DIR / CHANGES_DIR)
+
+    return {
+        "date": run_date,
+        "run": run,
+        **{k: summary.get(k) for k in SUMMARY_FIELDS},
+        "raw": _raw_digest(run_date),
+        "processed": _parquet_digest(REMOTE_DIR / PROCESSED_DIR / PARQUET_TEMPLATE.format(date=run_date)),
+        "changes": _digest(changes) if changes else None,
+        "seen": _query_digest(
+            DEFAULT_SEEN_DB,
+            "SELECT job_key, first_seen, last_seen, content_hash FROM job_seen ORDER BY job_key",
+        ),
+        "search": _query_digest(
+            DEFAULT_SEARCH_DB,
+            "SELECT job_key, scrape_date, title, company FROM jobs_doc ORDER BY job_key",
+        ),
+    }
+
+def replay(corpus: dict, verbose: bool = False) -> tuple[list[dict], list[dict], dict]:
+    """
+    Run runner.main once per recorded run, day by day on the corpus dates, in a
+    fresh temporary working directory with HTTP stubbed and Telegram disabled.
+    Returns (observed outputs per run, wall time and peak memory per day (see
+    PERF_METRICS), {date: raw digest} of every day read back from REMOTE_DIR
+    after the last run).
+    """
+    stub = SerpApiStub(corpus)
+    arrow_pool = pa.default_memory_pool()
+    observed, perf = [], []
+    env = {"SERPAPI_KEY": "replay", "TELEGRAM_BOT_TOKEN": "", "TELEGRAM_CHAT_ID": ""}
+    pipeline_log = logging.getLogger(logger.name)
+    level = pipeline_log.level
+    cwd = os.getcwd()
+
+    with tempfile.TemporaryDirectory(prefix="jobtracker-replay-") as work, \
+            mock.patch.dict(os.environ, env), \
+            mock.patch("requests.get", stub.get), \
+            mock.patch("source.scraper.time.sleep", lambda s: None):
+        os.chdir(work)
+        # A machine with a built search index; fresh runners (like CI) have none.
+        open_search_db().close()
+        if not verbose:
+            pipeline_log.setLevel(logging.WARNING)
+        try:
+            for day in corpus["days"]:
+                wall, peak, arrow = 0.0, 0, 0
+                for n, run in enumerate(day["runs"], start=1):
+                    stub.start_run(day, run)
+                    if run.get("fresh_runner") and Path("data").exists():
+                        _fresh_runner()
+                    SUMMARY_JSON.unlink(missing_ok=True)
+                    tracemalloc.start()
+                    t0 = time.perf_counter()
+                    runner.main(today=day["date"])
+                    wall += time.perf_counter() - t0
+                    peak = max(peak, tracemalloc.get_traced_memory()[1])
+                    arrow = arrow_pool.max_memory()
+                    tracemalloc.stop()
+                    _sync_up()
+                    observed.append(_observe(day["date"], n))
+                perf.append({
+                    "date": day["date"],
+                    "wall_s": round(wall, 3),
+                    "peak_mib": round(peak / 2**20, 1),
+                    "arrow_mib": round(arrow / 2**20, 1),
+                })
+            archive = {day["date"]: _raw_digest(day["date"]) for day in corpus["days"]}
+        finally:
+            tracemalloc.stop()
+            os.chdir(cwd)
+            pipeline_log.setLevel(level)
+
+    return observed, perf, archive
+
+def compare(
+    golden: dict,
+    corpus_digest: str,
+    observed: list[dict],
+    perf: list[dict],
+    archive: dict,
+) -> list[str]:
+    """Return human-readable mismatches between a replay and its golden file (empty if none)."""
+    problems = []
+    if golden.get("corpus") != corpus_digest:
+        problems.append("corpus differs from the one the golden file was recorded with")
+
+    expected = golden.get("runs", [])
+    if len(expected) != len(observed):
+        problems.append(f"expected {len(expected)} runs, replayed {len(observed)}")
+    for exp, got in zip(expected, observed):
+        for key in exp.keys() | got.keys():
+            if exp.get(key) != got.get(key):
+                problems.append(
+                    f"{got['date']} run {got['run']}: {key} expected {exp.get(key)!r}, got {got.get(key)!r}"
+                )
+
+    expected_archive = golden.get("archive", {})
+    for day in sorted(expected_archive.keys() | archive.keys()):
+        if expected_archive.get(day) != archive.get(day):
+            problems.append(
+                f"{day}: raw read back after the last run expected {expected_archive.get(day)!r}, "
+                f"got {archive.get(day)!r}"
+            )
+
+    limits = {**DEFAULT_LIMITS, **golden.get("limits", {})}
+    baseline = {day["date"]: day for day in golden.get("perf", [])}
+    for day in perf:
+        base = baseline.get(day["date"])
+        if base is None:
+            problems.append(f"{day['date']}: no recorded performance baseline")
+            continue
+        for key, label, unit, floor in PERF_METRICS:
+            ceiling = round(max(limits[floor], limits["factor"] * base.get(key, 0)), 3)
+            if day[key] > ceiling:
+                problems.append(
+                    f"{day['date']}: {label} {day[key]}{unit} > {ceiling}{unit} "
+                    f"({limits['factor']}x the recorded {base.get(key)}{unit})"
+                )
+    return problems
+
+def corpus_from_raw(start: str, end: str, raw_dir: str | Path | None = None) -> dict:
+    """Build a replay corpus from recorded days in data/raw (one run per day, 10 jobs per page)."""
+    days = []
+    day, last = date.fromisoformat(start), date.fromisoformat(end)
+    while day <= last:
+        try:
+            jobs = load_raw_jobs(day.isoformat(), raw_dir=raw_dir)
+        except FileNotFoundError:
+            jobs = None
+        if jobs is not None:
+            chunks = [jobs[i:i + JOBS_PER_PAGE] for i in range(0, len(jobs), JOBS_PER_PAGE)] or [[]]
+            pages = []
+            for i, chunk in enumerate(chunks):
+                page = {"jobs_results": chunk}
+                if i + 1 < len(chunks):
+                    page["serpapi_pagination"] = {"next_page_token": f"{day.isoformat()}#{i + 1}"}
+                pages.append(page)
+            days.append({"date": day.isoformat(), "pages": pages, "runs": [{}]})
+        day += timedelta(days=1)
+    logger.info(f"Built replay corpus from {len(days)} recorded days")
+    return {"version": 1, "account": {"searches_per_month": 250, "this_month_usage": 0}, "days": days}
+
+def _print_perf(perf: list[dict]):
+    print("date        wall time   heap peak  arrow hwm")
+    for day in perf:
+        print(f"{day['date']}  {day['wall_s']:8.3f}s  {day['peak_mib']:5.1f} MiB  {day['arrow_mib']:5.1f} MiB")
+
+def main(argv: list[str] | None = None) -> int:
+    """CLI: `python -m source.replay` (check) or `--update-golden`."""
+    parser = argparse.ArgumentParser(description="Deterministic end-to-end replay of the pipeline.")
+    parser.add_argument("--corpus", type=Path, default=None, help=f"default: {DEFAULT_CORPUS}")
+    parser.add_argument("--golden", type=Path, default=DEFAULT_GOLDEN)
+    parser.add_argument("--update-golden", action="store_true",
+                        help="Record this replay's outputs as the new golden file.")
+    parser.add_argument("--ceiling-factor", type=float,
+                        help="Allowed slowdown/growth per day over the recorded baseline "
+                             f"(default {DEFAULT_LIMITS['factor']}; stored with --update-golden).")
+    parser.add_argument("--from-raw", nargs=2, metavar=("START", "END"),
+                        help="Write a corpus built from data/raw days to --corpus, then exit.")
+    parser.add_argument("--verbose", action="store_true", help="Show the pipeline's own logs.")
+    args = parser.parse_args(argv)
+
+    if args.from_raw:
+        if args.corpus is None:
+            parser.error("--from-raw needs an explicit --corpus output path")
+        corpus = corpus_from_raw(*args.from_raw)
+        with gzip.open(args.corpus, "wt", encoding="utf-8") as f:
+            json.dump(corpus, f, ensure_ascii=False, separators=(",", ":"))
+        print(f"Wrote {args.corpus} ({len(corpus['days'])} days)")
+        return 0
+
+    corpus_path = args.corpus or DEFAULT_CORPUS
+    corpus_digest = hashlib.sha256(corpus_path.read_bytes()).hexdigest()[:16]
+    golden = {}
+    if args.golden.exists():
+        with args.golden.open("r", encoding="utf-8") as f:
+            golden = json.load(f)
+    limits = {**DEFAULT_LIMITS, **golden.get("limits", {})}
+    if args.ceiling_factor is not None:
+        limits["factor"] = args.ceiling_factor
+
+    observed, perf, archive = replay(load_corpus(corpus_path), verbose=args.verbose)
+    _print_perf(perf)
+
+    if args.update_golden:
+        golden = {
+            "corpus": corpus_digest,
+            "limits": limits,
+            "perf": perf,
+            "runs": observed,
+            "archive": archive,
+        }
+        with args.golden.open("w", encoding="utf-8") as f:
+            json.dump(golden, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"Updated {args.golden} ({len(observed)} runs)")
+        return 0
+
+    if not golden:
+        parser.error(f"no golden file at {args.golden}; run with --update-golden first")
+    problems = compare({**golden, "limits": limits}, corpus_digest, observed, perf, archive)
+    for problem in problems:
+        print(f"MISMATCH {problem}")
+    print(f"Replay: {len(observed)} runs over {len(perf)} days, {len(problems)} mismatches")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+from pathlib import Path
+from datetime import date, timedelta
+import sqlite3
+
+from source.logger import get_logger
+from source.policies import WEEKDAY_NAMES
+
+logger = get_logger()
+
+DEFAULT_HISTORY_DB = "data/state/run_history.sqlite"
+
+# Read windows are bounded: trends never scan more than this many days back.
+MAX_LOOKBACK_DAYS = 60
+WEEKDAY_WINDOW_DAYS = 56
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS run_history (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_date        DATE NOT NULL,
+    started_at      TEXT,
+    finished_at     TEXT,
+    cap             INTEGER,
+    requests_used   INTEGER,
+    stop_reason     TEXT,
+    total_jobs      INTEGER,
+    normalized      INTEGER,
+    uniques         INTEGER,
+    carryover       INTEGER,
+    remaining_after INTEGER,
+    total_seen      INTEGER,
+    account_s       REAL,
+    scrape_s        REAL,
+    normalize_s     REAL,
+    dedup_s         REAL,
+    store_s         REAL,
+    total_s         REAL
+);
+CREATE INDEX IF NOT EXISTS idx_run_history_date ON run_history(run_date);
+"""
+
+SUMMARY_COLUMNS = [
+    "cap", "requests_used", "stop_reason", "total_jobs", "normalized",
+    "uniques", "carryover", "remaining_after", "total_seen",
+]
+TIMING_COLUMNS = ["account_s", "scrape_s", "normalize_s", "dedup_s", "store_s", "total_s"]
+
+def open_history_db(db_path: str | Path = DEFAULT_HISTORY_DB) -> sqlite3.Connection:
+    """
+    Open (and initialize if needed) the SQLite run-history store.
+    Ensures schema exists and returns a ready-to-use connection.
+    """
+    path = Path(db_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+
+    conn.execute("PRAGMA journal_mode=WAL;")
+    conn.execute("PRAGMA synchronous=NORMAL;")
+
+    conn.executescript(SCHEMA)
+    conn.commit()
+
+    return conn
+
+def append_run(conn: sqlite3.Connection, summary: dict):
+    """Append one run summary (as built by summary.build_run_summary) to the history."""
+    timings = summary.get("timings") or {}
+    columns = ["run_date", "started_at", "finished_at", *SUMMARY_COLUMNS, *TIMING_COLUMNS]
+    values = [
+        summary.get("date"),
+        summary.get("started_at"),
+        summary.get("finished_at"),
+        *(summary.get(c) for c in SUMMARY_COLUMNS),
+        *(timings.get(c) for c in TIMING_COLUMNS),
+    ]
+    with conn:
+        conn.execute(
+            f"INSERT INTO run_history ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+            values,
+        )
+    logger.info(f"Appended run for {summary.get('date')} to run history")
+
+def _daily_rows(conn: sqlite3.Connection, since: str, until: str) -> dict[str, dict]:
+    """Return {run_date: last run of that day} for since <= run_date <= until."""
+    rows = conn.execute(
+        """
+        SELECT h.run_date, h.uniques, h.total_jobs, h.requests_used, h.total_seen
+        FROM run_history h
+        JOIN (
+            SELECT run_date, MAX(id) AS id FROM run_history
+            WHERE run_date BETWEEN ? AND ?
+            GROUP BY run_date
+        ) last ON last.id = h.id
+        """,
+        (since, until),
+    ).fetchall()
+    return {
+        r[0]: {"uniques": r[1] or 0, "total_jobs": r[2] or 0, "requests_used": r[3] or 0, "total_seen": r[4]}
+        for r in rows
+    }
+
+def _window_totals(days: dict[str, dict], end: date, length: int) -> dict:
+    start = end - timedelta(days=length - 1)
+    picked = [v for d, v in days.items() if start <= date.fromisoformat(d) <= end]
+    return {
+        "runs": len(picked),
+        "uniques": sum(v["uniques"] for v in picked),
+        "total_jobs": sum(v["total_jobs"] for v in picked),
+        "requests_used": sum(v["requests_used"] for v in picked),
+    }
+
+def compute_trends(conn: sqlite3.Connection, today: str) -> dict:
+    """
+    Rolling 7-/30-day totals, deltas against the preceding window, and average
+    new uniques per run by weekday. Reads at most MAX_LOOKBACK_DAYS of rows.
+    """
+    end = date.fromisoformat(today)
+    since = (end - timedelta(days=MAX_LOOKBACK_DAYS - 1)).isoformat()
+    days = _daily_rows(conn, since, today)
+
+    last_7 = _window_totals(days, end, 7)
+    prev_7 = _window_totals(days, end - timedelta(days=7), 7)
+    last_30 = _window_totals(days, end, 30)
+    prev_30 = _window_totals(days, end - timedelta(days=30), 30)
+
+    weekday_start = end - timedelta(days=WEEKDAY_WINDOW_DAYS - 1)
+    by_weekday = {name: [] for name in WEEKDAY_NAMES}
+    for d, v in days.items():
+        day = date.fromisoformat(d)
+        if day >= weekday_start:
+            by_weekday[WEEKDAY_NAMES[day.weekday()]].append(v["uniques"])
+    weekday_yield = {
+        name: round(sum(vals) / len(vals), 1) if vals else None
+        for name, vals in by_weekday.items()
+    }
+
+    return {
+        "last_7": last_7,
+        "last_30": last_30,
+        "delta_7": last_7["uniques"] - prev_7["uniques"] if prev_7["runs"] else None,
+        "delta_30": last_30["uniques"] - prev_30["uniques"] if prev_30["runs"] else None,
+        "weekday_yield": weekday_yield,
+    }
+
+def get_latest_run(conn: sqlite3.Connection) -> dict | None:
+    """Return the most recent run as a summary-shaped dict, or None if history is empty."""
+    cur = conn.execute("SELECT * FROM run_history ORDER BY id DESC LIMIT 1")
+    row = cur.fetchone()
+    if row is None:
+        return None
+    rec = dict(zip([c[0] for c in cur.description], row))
+    rec["date"] = rec.pop("run_date")
+    rec["timings"] = {c: rec.pop(c) for c in TIMING_COLUMNS}
+    return rec
@@ -1,4 +1,5 @@
-from datetime import date
+from datetime import date, datetime, timezone
+import time
 
 from source.account import fetch_account_info
 from source.config_loader import (
@@ -6,24 +7,36 @@ from source.config_loader import (
     get_serpapi_key,
     build_serpapi_params,
     load_core_keys,
+    load_skill_taxonomy,
 )
 from source.logger import get_logger
 from source.normalize import normalize_batch
 from source.policies import calculate_cap, detect_reset
-from source.scraper import fetch_jobs
+from source.scraper import fetch_jobs, dedupe_jobs
 from source.seen_store import (
     open_seen_db, 
     upsert_and_filter_uniques, 
-    count_total_seen
+    count_total_seen,
+    export_seen_snapshot,
+    select_unalerted,
+    mark_alerted,
 )
 from source.state_store import (
     open_state_db,
     get_state,
     update_last_reset,
     update_carryover,
+    save_checkpoint_page,
+    load_checkpoint,
+    clear_checkpoints,
+    get_account_snapshot,
+    QuotaBucket,
 )
-from source.storage import save_raw_json, save_processed_parquet
-from source.telegram_bot import send_telegram_message
+from source.storage import new_run_id, save_raw_jobs, save_processed_parquet, save_changes_parquet
+from source.search_index import open_search_db, index_records, search_db_exists
+from source.skills import build_matchers, tag_batch
+from source.telegram_bot import send_telegram_message, TelegramQueue, format_job_alerts
+from source.run_history import open_history_db, append_run, compute_trends
 from source.summary import (
     build_run_summary,
     print_run_summary,
@@ -33,52 +46,74 @@ from source.summary import (
 
 logger = get_logger()
 
-def main():
+def main(today: str | None = None):
     """
-    Run the full Data Scientist Job Tracker pipeline.
+    Run the full Data Scientist Job Tracker pipeline for `today` (YYYY-MM-DD,
+    default: the system date; source.replay passes simulated dates).
 
     Steps:
     1. Load configuration and API key.
-    2. Fetch account info and compute request cap.
-    3. Scrape job listings from SerpApi.
+    2. Read account info (cached) and set today's shared request cap.
+    3. Scrape job listings from SerpApi, checkpointing each page.
     4. Normalize and deduplicate results.
-    5. Save raw JSON and processed Parquet.
-    6. Update persistent state and summarize run.
+    5. Tag skills/tools/seniority, save raw JSON and processed Parquet.
+    6. Update persistent state, record run history and summarize run.
 
     Handles logging, errors, and state persistence automatically.
     """
     logger.info("Run started")
+    run_t0 = time.perf_counter()
+    started_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    timings = {}
     
-    today_iso = date.today().isoformat()
+    today_iso = today or date.today().isoformat()
+    run_id = new_run_id()
     settings = load_settings()
     budget = settings["budget"]
     api_key = get_serpapi_key()
     params = build_serpapi_params(settings, api_key)
     core_keys = load_core_keys()
+    matchers = build_matchers(load_skill_taxonomy())
     
+    notifier = TelegramQueue().start()
     state_conn = open_state_db(today_iso)
     seen_conn = None
+    search_conn = None
+    history_conn = None
     try:
         # ---- State + account
         state = get_state(state_conn)
         last_reset = state["last_reset"] 
         carryover_requests = state["carryover_requests"]
 
-        quota, remaining, used = fetch_account_info()
+        t = time.perf_counter()
+        quota, remaining, used = get_account_snapshot(state_conn, fetch_account_info, today_iso)
+        timings["account_s"] = round(time.perf_counter() - t, 3)
         if detect_reset(quota, remaining, used):
             logger.info("Detected monthly reset from SerpApi account endpoint.")
             update_last_reset(state_conn, today_iso)
             update_carryover(state_conn, 0)
             carryover_requests = 0
             
-        # ---- Cap
-        cap = calculate_cap(
+        # ---- Checkpoint (same-day rerun resumes instead of re-spending quota)
+        clear_checkpoints(state_conn, before=today_iso)
+        checkpoint = load_checkpoint(state_conn, today_iso)
+        prior_used = checkpoint["pages"]
+        if prior_used:
+            logger.info(
+                f"Resuming today's run: pages_already_fetched={prior_used}, "
+                f"jobs_already_fetched={len(checkpoint['jobs'])}"
+            )
+
+        # ---- Cap (set once per day in the shared quota bucket)
+        bucket = QuotaBucket(state_conn, today_iso)
+        cap = bucket.ensure_capacity(lambda: calculate_cap(
             remaining=remaining,
             last_reset=last_reset,
             today=today_iso,
             budget=budget,
             carryover_requests=carryover_requests,
-        )
+        ))
         if cap <= 0:
             update_carryover(state_conn, 0)
             logger.info("Cap is 0, skipping scrape.")
@@ -86,45 +121,90 @@ def main():
                 today=today_iso, cap=0, remaining_after=remaining,
                 scrape_state={"requests_used": 0, "total_jobs": 0, "reason": "cap_zero"},
                 seen_stats={"touched": 0, "inserted": 0, "updated": 0},
-                carryover=0
+                carryover=0,
+                timings={**timings, "total_s": round(time.perf_counter() - run_t0, 3)},
+                started_at=started_at,
             )
             print_run_summary(summary)
-            text = format_summary_for_telegram(summary)
-            send_telegram_message(text)
+            history_conn = open_history_db()
+            append_run(history_conn, summary)
+            trends = compute_trends(history_conn, today_iso)
+            notifier.enqueue(format_summary_for_telegram(summary, trends))
             return
-        logger.info(f"Cap computed: cap={cap} (remaining={remaining}, carryover={carryover_requests})")
+        _, drawn = bucket.status()
+        logger.info(f"Cap for today: cap={cap} (remaining={remaining}, carryover={carryover_requests}, already_drawn={drawn})")
         
         # ---- Scrape
-        raw_jobs, scrape_state = fetch_jobs(dict(params), cap)
+        t = time.perf_counter()
+        if checkpoint["exhausted"]:
+            logger.info("Pagination already finished earlier today; reusing checkpointed pages.")
+            new_jobs, scrape_state = [], {"requests_used": 0, "total_jobs": 0, "reason": "resumed_exhausted"}
+        else:
+            new_jobs, scrape_state = fetch_jobs(
+                dict(params),
+                cap - prior_used,
+                start_token=checkpoint["next_page_token"],
+                start_page=prior_used,
+                on_page=lambda page, jobs, token: save_checkpoint_page(
+                    state_conn, today_iso, page, jobs, token
+                ),
+                bucket=bucket,
+            )
+        requests_spent = scrape_state.get("requests_used", 0)
+        raw_jobs = dedupe_jobs(checkpoint["jobs"] + new_jobs)
+        scrape_state["requests_used"] = prior_used + requests_spent
+        scrape_state["total_jobs"] = len(raw_jobs)
+        timings["scrape_s"] = round(time.perf_counter() - t, 3)
         logger.info(f"Stop reason: {scrape_state.get('reason')}")
+        t = time.perf_counter()
         if raw_jobs:
-            save_raw_json(raw_jobs, today_iso)
+            save_raw_jobs(raw_jobs, today_iso, run_id=run_id)
         else:
             logger.info("No raw jobs returned; skipping normalization/storage.")
+        store_s = time.perf_counter() - t
 
         # ---- Normalize + dedup
+        t = time.perf_counter()
         normalized = normalize_batch(raw_jobs, core_keys, today_iso) if raw_jobs else []
+        timings["normalize_s"] = round(time.perf_counter() - t, 3)
+        # Records keep references into the raw dicts they need; drop the rest.
+        del raw_jobs, new_jobs, checkpoint
+        t = time.perf_counter()
         seen_conn = open_seen_db()
         if normalized:
-            uniques, seen_stats = upsert_and_filter_uniques(seen_conn, normalized, today_iso)
+            uniques, changes, seen_stats = upsert_and_filter_uniques(seen_conn, normalized, today_iso)
         else:
-            uniques, seen_stats = [], {"touched": 0, "inserted": 0, "updated": 0}
+            uniques, changes, seen_stats = [], [], {"touched": 0, "inserted": 0, "updated": 0}
+        export_seen_snapshot(seen_conn)
+        timings["dedup_s"] = round(time.perf_counter() - t, 3)
                 
         # ---- Store processed
+        t = time.perf_counter()
         if uniques:  
+            tag_batch(uniques, matchers)
             save_processed_parquet(uniques, today_iso)
             logger.info(f"Normalized {len(normalized)} rows, stored {len(uniques)} uniques.")
+
+            # The search index is local-only; CI runners never have one to update.
+            if search_db_exists():
+                search_conn = open_search_db()
+                index_records(search_conn, uniques)
             
         else:
             logger.info("No unique rows to store.")
+        if changes:
+            save_changes_parquet(changes, today_iso, run_id=run_id)
+        timings["store_s"] = round(store_s + time.perf_counter() - t, 3)
 
         # ---- State update (carryover)
-        requests_used = scrape_state.get("requests_used", 0)
-        unused_today = max(0, cap - requests_used)
+        # The bucket also counts draws by any other process that ran today.
+        _, drawn = bucket.status()
+        unused_today = max(0, cap - drawn)
         update_carryover(state_conn, unused_today)
         
         # ---- Summary
-        remaining_after = max(0, remaining - requests_used)
+        # `remaining` was read after any earlier same-day pages were already charged.
+        remaining_after = max(0, remaining - requests_spent)
         total_seen = count_total_seen(seen_conn)
         
         summary = build_run_summary(
@@ -135,20 +215,39 @@ def main():
             seen_stats=seen_stats,
             carryover=unused_today,
             total_seen=total_seen,
+            timings={**timings, "total_s": round(time.perf_counter() - run_t0, 3)},
+            started_at=started_at,
         )
         print_run_summary(summary)
         
-        text = format_summary_for_telegram(summary)
-        send_telegram_message(text)
+        history_conn = open_history_db()
+        append_run(history_conn, summary)
+        trends = compute_trends(history_conn, today_iso)
+        
+        notifier.enqueue(format_summary_for_telegram(summary, trends))
+        # A same-day rerun re-emits today's uniques; alert only those whose alerts
+        # were never queued (e.g. an earlier run crashed before this point).
+        # Queued messages survive a crash via the notifier's outbox.
+        if notifier.enabled and uniques:
+            pending = select_unalerted(seen_conn, [u.job_key for u in uniques])
+            to_alert = [u for u in uniques if u.job_key in pending]
+            for text in format_job_alerts(to_alert):
+                notifier.enqueue(text)
+            mark_alerted(seen_conn, [u.job_key for u in to_alert], today_iso)
         
         save_summary_json(summary)
         
         logger.info("Run finished")
     
     finally:
+        notifier.close()
         try:
             if seen_conn is not None:
                 seen_conn.close()
+            if search_conn is not None:
+                search_conn.close()
+            if history_conn is not None:
+                history_conn.close()
         finally:
             state_conn.close()
 
@@ -1,63 +1,125 @@
+from typing import Callable
+import json
 import time
 import requests
+from urllib3.exceptions import NewConnectionError
 
 from source.logger import get_logger
+from source.state_store import QuotaBucket
 
 logger = get_logger()
 
 ENDPOINT = "https://serpapi.com/search.json"
+# SerpApi rejects these before running a search, so they are not billed.
+# 5xx responses and read timeouts may come after the search ran and was charged.
+UNBILLED_STATUSES = range(400, 500)
 
-def fetch_jobs(params: dict, today_cap: int, delay: float = 0.3) -> tuple[list[dict], dict]:
+def _unbilled(exc: requests.RequestException) -> bool:
+    """True only if the failed request surely did not cost a SerpApi search."""
+    if isinstance(exc, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(exc, requests.exceptions.HTTPError):
+        return exc.response is not None and exc.response.status_code in UNBILLED_STATUSES
+    if isinstance(exc, requests.exceptions.ConnectionError):
+        # Connection never established (refused, DNS failure); a dropped
+        # connection mid-response is a ConnectionError too, but may be billed.
+        reason = getattr(exc.args[0], "reason", None) if exc.args else None
+        return isinstance(reason, NewConnectionError)
+    return False
+
+def fetch_jobs(
+    params: dict,
+    today_cap: int,
+    delay: float = 0.3,
+    start_token: str | None = None,
+    start_page: int = 0,
+    on_page: Callable[[int, list[dict], str | None], None] | None = None,
+    bucket: QuotaBucket | None = None,
+) -> tuple[list[dict], dict]:
     """Fetch job postings from SerpApi with pagination and basic rate control.
-    
+
+    Resumes from `start_token` when given (`start_page` pages already fetched).
+    `on_page(page, jobs, next_page_token)` is called right after each successful
+    request so callers can checkpoint progress before the next one is spent.
+    With a `bucket`, every request first draws a token from the shared
+    cross-process quota. A failed request gives it back only when SerpApi
+    surely did not bill it (see `_unbilled`); after a read timeout the search
+    may already have run, so the token stays spent.
+
     Returns:
-        all_jobs: list of raw job dicts
-        stats: dict with debug info (pages, total_jobs, reason)
+        all_jobs: list of raw job dicts fetched by this call
+        stats: dict with debug info (requests_used, total_jobs, reason)
     """
     used = 0
-    token = None
+    token = start_token
     all_jobs = []
     reason = "limit_reached"
 
     while used < today_cap:
+        page = start_page + used + 1
         if token:
             params["next_page_token"] = token
         elif "next_page_token" in params:
             del params["next_page_token"]
 
+        if bucket is not None and not bucket.draw():
+            reason = "quota_bucket_empty"
+            logger.info("Shared quota bucket is empty; stopping.")
+            break
+
         try:
             r = requests.get(ENDPOINT, params=params, timeout=30)
             r.raise_for_status()
-        except requests.exceptions.Timeout:
-            reason = f"timeout_page_{used+1}"
+        except requests.exceptions.Timeout as e:
+            reason = f"timeout_page_{page}"
             logger.warning(reason)
+            if bucket is not None and _unbilled(e):
+                bucket.refund()
             break
         except requests.RequestException as e:
-            reason = f"error_page_{used+1}:{e}"
+            reason = f"error_page_{page}:{e}"
             logger.error(reason)
+            if bucket is not None and _unbilled(e):
+                bucket.refund()
             break
 
         used += 1
         data = r.json()
         jobs = data.get("jobs_results", [])
+        pagination = data.get("serpapi_pagination") or {}
+        token = pagination.get("next_page_token") if jobs else None
+
+        if on_page is not None:
+            on_page(page, jobs, token)
 
         if not jobs:
-            reason = f"empty_page_{used}"
-            logger.info(f"No jobs on page {used}")
+            reason = f"empty_page_{page}"
+            logger.info(f"No jobs on page {page}")
             break
 
-        pagination = data.get("serpapi_pagination") or {}
-        token = pagination.get("next_page_token")
-
         all_jobs.extend(jobs)
 
         if not token:
-            reason = f"no_next_page_{used}"
-            logger.info(f"No next_page_token after page {used}")
+            reason = f"no_next_page_{page}"
+            logger.info(f"No next_page_token after page {page}")
             break
 
         time.sleep(delay)
 
     stats = {"requests_used": used, "total_jobs": len(all_jobs), "reason": reason}
     logger.info(f"Fetched pages={used}, jobs={len(all_jobs)}, reason={reason}")
-    return all_jobs, stats
\ No newline at end of file
+    return all_jobs, stats
+
+def dedupe_jobs(jobs: list[dict]) -> list[dict]:
+    """Drop repeated raw jobs (by job_id, else by full content), keeping first occurrence."""
+    seen = set()
+    unique = []
+    for job in jobs:
+        key = job.get("job_id") or json.dumps(job, sort_keys=True, ensure_ascii=False)
+        if key in seen:
+            continue
+        seen.add(key)
+        unique.append(job)
+    if len(unique) < len(jobs):
+        logger.info(f"Dropped {len(jobs) - len(unique)} duplicate raw jobs across pages")
+    return unique
\ No newline at end of file
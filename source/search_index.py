@@ -0,0 +1,282 @@
+from pathlib import Path
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+
+import pyarrow.parquet as pq
+
+from source.logger import get_logger
+from source.records import JobRecord
+from source.storage import PROCESSED_DIR
+
+logger = get_logger()
+
+# Local only: the index keeps every description in full, so it stays out of
+# data/state (which CI syncs both ways on every run). Build it once from the
+# processed history with `--rebuild`; runs then add their uniques to it.
+DEFAULT_SEARCH_DB = "data/search/jobs_search.sqlite"
+LEGACY_SEARCH_DB = "data/state/jobs_search.sqlite"
+
+# `jobs_doc` holds one row per job_key; `jobs_fts` is an external-content FTS5
+# index over it, so text is stored once and kept in sync by the triggers below.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs_doc (
+    rowid INTEGER PRIMARY KEY,
+    job_key TEXT NOT NULL UNIQUE,
+    scrape_date DATE NOT NULL,
+    title TEXT,
+    company TEXT,
+    description TEXT,
+    highlights TEXT,
+    google_share_url TEXT
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5(
+    title, company, description, highlights,
+    content='jobs_doc', content_rowid='rowid',
+    tokenize='porter unicode61'
+);
+
+CREATE TRIGGER IF NOT EXISTS jobs_doc_ai AFTER INSERT ON jobs_doc BEGIN
+    INSERT INTO jobs_fts(rowid, title, company, description, highlights)
+    VALUES (new.rowid, new.title, new.company, new.description, new.highlights);
+END;
+
+CREATE TRIGGER IF NOT EXISTS jobs_doc_ad AFTER DELETE ON jobs_doc BEGIN
+    INSERT INTO jobs_fts(jobs_fts, rowid, title, company, description, highlights)
+    VALUES ('delete', old.rowid, old.title, old.company, old.description, old.highlights);
+END;
+
+CREATE TRIGGER IF NOT EXISTS jobs_doc_au AFTER UPDATE ON jobs_doc BEGIN
+    INSERT INTO jobs_fts(jobs_fts, rowid, title, company, description, highlights)
+    VALUES ('delete', old.rowid, old.title, old.company, old.description, old.highlights);
+    INSERT INTO jobs_fts(rowid, title, company, description, highlights)
+    VALUES (new.rowid, new.title, new.company, new.description, new.highlights);
+END;
+"""
+
+UPSERT_SQL = """
+INSERT INTO jobs_doc (job_key, scrape_date, title, company, description, highlights, google_share_url)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(job_key) DO UPDATE SET
+    scrape_date=excluded.scrape_date,
+    title=excluded.title,
+    company=excluded.company,
+    description=excluded.description,
+    highlights=excluded.highlights,
+    google_share_url=excluded.google_share_url
+"""
+
+# Column weights for bm25(): title and company matches rank above body text.
+BM25_WEIGHTS = (10.0, 5.0, 1.0, 2.0)
+
+# A "quoted phrase" or a run of non-space characters.
+LITERAL_TOKEN_RE = re.compile(r'"([^"]*)"|(\S+)')
+
+def _move_legacy_index(path: Path):
+    """Move an index built under data/state by an older version to its local-only home."""
+    legacy = Path(LEGACY_SEARCH_DB)
+    if path.exists() or not legacy.exists():
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    for suffix in ("", "-wal", "-shm"):
+        src = legacy.with_name(legacy.name + suffix)
+        if src.exists():
+            os.replace(src, path.with_name(path.name + suffix))
+    logger.info(f"Search index: moved {legacy} to {path}")
+
+def search_db_exists(db_path: str | Path = DEFAULT_SEARCH_DB) -> bool:
+    """True if a search index has been built here (runs only update an existing one)."""
+    path = Path(db_path)
+    if path == Path(DEFAULT_SEARCH_DB):
+        _move_legacy_index(path)
+    return path.exists()
+
+def open_search_db(db_path: str | Path = DEFAULT_SEARCH_DB) -> sqlite3.Connection:
+    """
+    Open (and initialize if needed) the SQLite FTS5 search index.
+    Ensures schema exists and returns a ready-to-use connection.
+    """
+    path = Path(db_path)
+    if path == Path(DEFAULT_SEARCH_DB):
+        _move_legacy_index(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+
+    conn.execute("PRAGMA journal_mode=WAL;")
+    conn.execute("PRAGMA synchronous=NORMAL;")
+
+    conn.executescript(SCHEMA)
+    conn.commit()
+
+    return conn
+
+def _highlights_text(highlights) -> str | None:
+    """Flatten SerpApi job_highlights (list or JSON string) into plain text."""
+    if not highlights:
+        return None
+    if isinstance(highlights, str):
+        try:
+            highlights = json.loads(highlights)
+        except json.JSONDecodeError:
+            return highlights
+    parts = []
+    for block in highlights:
+        if not isinstance(block, dict):
+            continue
+        if block.get("title"):
+            parts.append(str(block["title"]))
+        parts.extend(str(item) for item in block.get("items") or [])
+    return "\n".join(parts) or None
+
+def _to_doc_row(rec: JobRecord | dict) -> tuple:
+    return (
+        rec.get("job_key"),
+        rec.get("scrape_date"),
+        rec.get("title"),
+        rec.get("company"),
+        rec.get("description_raw"),
+        _highlights_text(rec.get("job_highlights_raw")),
+        rec.get("google_share_url"),
+    )
+
+def index_records(conn: sqlite3.Connection, records: list[JobRecord] | list[dict]) -> int:
+    """Add or refresh normalized records in the search index. Returns rows written."""
+    rows = [_to_doc_row(r) for r in records if r.get("job_key")]
+    if not rows:
+        return 0
+    with conn:
+        conn.executemany(UPSERT_SQL, rows)
+    logger.info(f"Search index: indexed {len(rows)} records")
+    return len(rows)
+
+def rebuild_from_processed(
+    conn: sqlite3.Connection,
+    processed_dir: str | Path = PROCESSED_DIR,
+) -> int:
+    """Drop the index contents and re-index every processed Parquet file in date order."""
+    with conn:
+        conn.execute("DELETE FROM jobs_doc")
+        conn.execute("INSERT INTO jobs_fts(jobs_fts) VALUES ('rebuild')")
+
+    total = _index_processed(conn, sorted(Path(processed_dir).glob("jobs_*.parquet")))
+    logger.info(f"Search index rebuilt from {processed_dir}: {total} records")
+    return total
+
+def update_from_processed(
+    conn: sqlite3.Connection,
+    processed_dir: str | Path = PROCESSED_DIR,
+) -> int:
+    """
+    Index processed Parquet files from the newest indexed date onwards, e.g.
+    after syncing data/processed down. Re-indexing that date is a no-op upsert.
+    """
+    row = conn.execute("SELECT MAX(scrape_date) FROM jobs_doc").fetchone()
+    since = f"jobs_{row[0]}.parquet" if row and row[0] else ""
+    paths = [p for p in sorted(Path(processed_dir).glob("jobs_*.parquet")) if p.name >= since]
+    total = _index_processed(conn, paths)
+    logger.info(f"Search index updated from {processed_dir}: {total} records in {len(paths)} files")
+    return total
+
+def _index_processed(conn: sqlite3.Connection, paths: list[Path]) -> int:
+    columns = ["job_key", "scrape_date", "title", "company",
+               "description_raw", "job_highlights_raw", "google_share_url"]
+    total = 0
+    for path in paths:
+        table = pq.read_table(path, columns=columns)
+        total += index_records(conn, table.to_pylist())
+
+    with conn:
+        conn.execute("INSERT INTO jobs_fts(jobs_fts) VALUES ('optimize')")
+    return total
+
+def literal_query(text: str) -> str:
+    """
+    Turn plain keywords into an FTS5 query that matches them all, taken literally:
+    each word (or "quoted phrase") becomes a quoted string, so `C++`, `A/B testing`
+    or `node.js` cannot be parsed as FTS5 operators.
+    """
+    terms = []
+    for phrase, word in LITERAL_TOKEN_RE.findall(text):
+        term = (phrase or word).strip()
+        if term:
+            terms.append('"' + term.replace('"', '""') + '"')
+    return " ".join(terms)
+
+def search(conn: sqlite3.Connection, query: str, limit: int = 20, literal: bool = False) -> list[dict]:
+    """
+    Run an FTS5 query (keywords, "quoted phrases", AND/OR/NOT, column filters
+    such as `title:scientist`) and return BM25-ranked matches, best first.
+    With literal=True the query is plain keywords (see literal_query).
+    Invalid FTS5 syntax raises sqlite3.OperationalError.
+    """
+    if literal:
+        query = literal_query(query)
+        if not query:
+            return []
+    rows = conn.execute(
+        f"""
+        SELECT d.job_key, d.scrape_date, d.title, d.company, d.google_share_url,
+               snippet(jobs_fts, 2, '[', ']', '…', 12),
+               bm25(jobs_fts, {", ".join(str(w) for w in BM25_WEIGHTS)}) AS score
+        FROM jobs_fts
+        JOIN jobs_doc d ON d.rowid = jobs_fts.rowid
+        WHERE jobs_fts MATCH ?
+        ORDER BY score
+        LIMIT ?
+        """,
+        (query, limit),
+    ).fetchall()
+    keys = ["job_key", "scrape_date", "title", "company", "google_share_url", "snippet", "score"]
+    return [dict(zip(keys, row)) for row in rows]
+
+def main(argv: list[str] | None = None):
+    """CLI: `python -m source.search_index "causal inference"`, `--rebuild` or `--update`."""
+    parser = argparse.ArgumentParser(description="Full-text search over tracked job postings.")
+    parser.add_argument("query", nargs="?", help='keywords, e.g. pytorch "causal inference" C++')
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--raw-fts", action="store_true",
+                        help="Treat the query as FTS5 syntax (AND/OR/NOT, column filters).")
+    parser.add_argument("--db", default=DEFAULT_SEARCH_DB)
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Rebuild the index from data/processed before searching.")
+    parser.add_argument("--update", action="store_true",
+                        help="Index data/processed days newer than the index before searching.")
+    args = parser.parse_args(argv)
+
+    if not args.query and not args.rebuild and not args.update:
+        parser.error("a query, --rebuild or --update is required")
+    if args.query and not (args.rebuild or args.update) and not search_db_exists(args.db):
+        print(f"No search index at {args.db}; build it from data/processed with --rebuild first.")
+        return 2
+
+    conn = open_search_db(args.db)
+    try:
+        if args.rebuild:
+            rebuild_from_processed(conn)
+        elif args.update:
+            update_from_processed(conn)
+        if args.query:
+            try:
+                hits = search(conn, args.query, args.limit, literal=not args.raw_fts)
+            except sqlite3.OperationalError as e:
+                print(f"Invalid search query {args.query!r}: {e}")
+                if args.raw_fts:
+                    print("FTS5 syntax: https://www.sqlite.org/fts5.html#full_text_query_syntax "
+                          "(or drop --raw-fts to search plain keywords)")
+                return 2
+            for hit in hits:
+                print(f"{hit['score']:8.2f}  {hit['scrape_date']}  {hit['title']} — {hit['company']}")
+                print(f"          {hit['snippet']}")
+                if hit["google_share_url"]:
+                    print(f"          {hit['google_share_url']}")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,20 +1,57 @@
 from pathlib import Path
+import hashlib
+import json
+import mmap
+import os
 import sqlite3
+import struct
+
+import numpy as np
 
 from source.logger import get_logger
+from source.records import JobRecord
 
 logger = get_logger()
 
 DEFAULT_SEEN_DB = "data/state/seen_jobs.sqlite"
+SEEN_SNAPSHOT_PATH = "data/state/seen_keys.bin"
+
+# Snapshot layout: a 16-byte header (magic + little-endian key count), then
+# `count` BLAKE2b-128 digests of job_key in ascending byte order.
+SNAPSHOT_MAGIC = b"SEENKEY1"
+SNAPSHOT_HEADER = struct.Struct("<8sQ")
+SNAPSHOT_KEY_BYTES = 16
+SNAPSHOT_DTYPE = f"S{SNAPSHOT_KEY_BYTES}"
 
 SCHEMA = """
 CREATE TABLE IF NOT EXISTS job_seen (
     job_key TEXT PRIMARY KEY,
     first_seen DATE NOT NULL,
-    last_seen DATE NOT NULL
+    last_seen DATE NOT NULL,
+    content_hash TEXT,
+    field_hashes TEXT,
+    alerted DATE
 );
 """
 
+# Columns added after the first release; ALTERed into older DBs on open.
+MIGRATED_COLUMNS = [("content_hash", "TEXT"), ("field_hashes", "TEXT"), ("alerted", "DATE")]
+
+# Fields compared for change-data-capture. SerpApi rewrites some of them daily
+# without the posting changing, so posted_at ("3 days ago") is dropped from the
+# metadata and apply options are compared as an unordered set.
+CDC_FIELDS = (
+    "title",
+    "company",
+    "location",
+    "via",
+    "description_raw",
+    "job_highlights_raw",
+    "job_metadata_raw",
+    "apply_options_raw",
+)
+CDC_VOLATILE_METADATA = ("posted_at",)
+
 def open_seen_db(db_path: str | Path = DEFAULT_SEEN_DB) -> sqlite3.Connection:
     """
     Open (and initialize if needed) the SQLite database for seen jobs.
@@ -28,10 +65,38 @@ def open_seen_db(db_path: str | Path = DEFAULT_SEEN_DB) -> sqlite3.Connection:
     conn.execute("PRAGMA synchronous=NORMAL;")
     
     conn.execute(SCHEMA)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(job_seen)")}
+    for name, decl in MIGRATED_COLUMNS:
+        if name not in columns:
+            conn.execute(f"ALTER TABLE job_seen ADD COLUMN {name} {decl}")
+            logger.info(f"Seen store: added column job_seen.{name}")
+            if name == "alerted":
+                # Keys stored before the flag existed were alerted (or skipped) back then.
+                conn.execute("UPDATE job_seen SET alerted = first_seen")
     conn.commit()
     
     return conn
 
+def _cdc_value(record: JobRecord, field: str):
+    value = record.get(field)
+    if field == "job_metadata_raw" and value:
+        value = {k: v for k, v in value.items() if k not in CDC_VOLATILE_METADATA}
+    elif field == "apply_options_raw" and value:
+        value = sorted(value, key=lambda o: json.dumps(o, sort_keys=True, ensure_ascii=False))
+    return value
+
+def content_hashes(record: JobRecord) -> tuple[str, dict[str, str]]:
+    """Return (content_hash, {field: hash}) over CDC_FIELDS for one record."""
+    fields = {
+        f: hashlib.blake2b(
+            json.dumps(_cdc_value(record, f), sort_keys=True, ensure_ascii=False).encode("utf-8"),
+            digest_size=8,
+        ).hexdigest()
+        for f in CDC_FIELDS
+    }
+    content = hashlib.blake2b("".join(fields.values()).encode("ascii"), digest_size=16).hexdigest()
+    return content, fields
+
 def select_seen(conn: sqlite3.Connection, job_keys: list[str], chunk: int = 800) -> set[str]:
     """Return the subset of job_keys already present in job_seen."""
     if not job_keys:
@@ -46,19 +111,78 @@ def select_seen(conn: sqlite3.Connection, job_keys: list[str], chunk: int = 800)
         seen.update(r[0] for r in rows)
     return seen
 
+def select_seen_hashes(conn: sqlite3.Connection, job_keys: list[str], chunk: int = 800) -> dict[str, tuple]:
+    """Return {job_key: (first_seen, content_hash)} for the subset of job_keys already present."""
+    found = {}
+    for i in range(0, len(job_keys), chunk):
+        part = job_keys[i:i+chunk]
+        q = ",".join("?" * len(part))
+        rows = conn.execute(
+            f"SELECT job_key, first_seen, content_hash FROM job_seen WHERE job_key IN ({q})", part
+        ).fetchall()
+        found.update((r[0], (r[1], r[2])) for r in rows)
+    return found
+
+def select_field_hashes(conn: sqlite3.Connection, job_keys: list[str], chunk: int = 800) -> dict[str, dict]:
+    """Return {job_key: {field: hash}} for keys that have stored field hashes."""
+    found = {}
+    for i in range(0, len(job_keys), chunk):
+        part = job_keys[i:i+chunk]
+        q = ",".join("?" * len(part))
+        rows = conn.execute(
+            f"SELECT job_key, field_hashes FROM job_seen WHERE job_key IN ({q}) AND field_hashes IS NOT NULL",
+            part,
+        ).fetchall()
+        found.update((k, json.loads(v)) for k, v in rows)
+    return found
+
+def select_unalerted(conn: sqlite3.Connection, job_keys: list[str], chunk: int = 800) -> set[str]:
+    """Return the subset of job_keys whose alerts have not been queued yet."""
+    pending = set()
+    for i in range(0, len(job_keys), chunk):
+        part = job_keys[i:i+chunk]
+        q = ",".join("?" * len(part))
+        rows = conn.execute(
+            f"SELECT job_key FROM job_seen WHERE job_key IN ({q}) AND alerted IS NULL", part
+        ).fetchall()
+        pending.update(r[0] for r in rows)
+    return pending
+
+def mark_alerted(conn: sqlite3.Connection, job_keys: list[str], today: str) -> int:
+    """Record that alerts for job_keys were queued (and so persist in the outbox)."""
+    job_keys = [k for k in job_keys if k]
+    if not job_keys:
+        return 0
+    with conn:
+        conn.executemany(
+            "UPDATE job_seen SET alerted=? WHERE job_key=? AND alerted IS NULL",
+            [(today, k) for k in job_keys]
+        )
+    return len(job_keys)
+
 def count_total_seen(conn: sqlite3.Connection) -> int:
     """Return total distinct job keys ever seen."""
     row = conn.execute("SELECT COUNT(*) FROM job_seen").fetchone()
     return row[0] if row else 0
 
-def insert_new_keys(conn: sqlite3.Connection, new_keys: list[str], today: str) -> int:
-    """INSERT new keys with first_seen=last_seen=today."""
+def insert_new_keys(
+    conn: sqlite3.Connection,
+    new_keys: list[str],
+    today: str,
+    hashes: dict[str, tuple] | None = None,
+) -> int:
+    """INSERT new keys with first_seen=last_seen=today (and their content hashes, if given)."""
     new_keys = [k for k in new_keys if k]
     if not new_keys:
         return 0
+    hashes = hashes or {}
+    rows = []
+    for k in new_keys:
+        content, fields = hashes.get(k, (None, None))
+        rows.append((k, today, today, content, json.dumps(fields) if fields else None))
     conn.executemany(
-        "INSERT INTO job_seen(job_key, first_seen, last_seen) VALUES (?, ?, ?)",
-        [(k, today, today) for k in new_keys]
+        "INSERT INTO job_seen(job_key, first_seen, last_seen, content_hash, field_hashes) VALUES (?, ?, ?, ?, ?)",
+        rows
     )
     return len(new_keys)
 
@@ -73,19 +197,39 @@ def update_existing_keys(conn: sqlite3.Connection, existing_keys: list[str], tod
     )
     return len(existing_keys)
 
+def update_content_hashes(conn: sqlite3.Connection, hashes: dict[str, tuple]) -> int:
+    """Store new (content_hash, field_hashes) for keys whose content changed or was never hashed."""
+    if not hashes:
+        return 0
+    conn.executemany(
+        "UPDATE job_seen SET content_hash=?, field_hashes=? WHERE job_key=?",
+        [(content, json.dumps(fields), k) for k, (content, fields) in hashes.items()]
+    )
+    return len(hashes)
+
 
 def upsert_and_filter_uniques(
     conn: sqlite3.Connection,
-    records: list[dict],
+    records: list[JobRecord],
     today: str
-) -> tuple[list[dict], dict]:
+) -> tuple[list[JobRecord], list[tuple[JobRecord, list[str]]], dict]:
     """
     Return only records not seen before; also insert new keys and update last_seen
     for previously seen keys. Writes are done in a single transaction.
+
+    Keys first seen earlier *today* (a resumed or repeated same-day run) are
+    returned as uniques too, after the brand-new ones, so the day's processed
+    output stays complete. stats["inserted"] counts only the brand-new keys.
+    Whether a unique was already alerted is tracked separately (`alerted`).
+
+    Each record's content hash (over CDC_FIELDS) is compared in bulk with the
+    stored one. Re-seen postings whose content changed are returned as
+    (record, changed_fields) in the second element; keys stored before content
+    hashing existed are hashed silently, as a baseline.
     """
     keyed = {}
     for record in records:
-        k = record.get("job_key")
+        k = record.job_key
         if not k:
             continue
         if k in keyed:
@@ -94,26 +238,125 @@ def upsert_and_filter_uniques(
 
     keys = list(keyed.keys())
     if not keys:
-        return [], {"already_seen": 0, "inserted": 0, "updated": 0}
+        return [], [], {"already_seen": 0, "inserted": 0, "updated": 0, "changed": 0}
 
-    seen = select_seen(conn, keys)
+    hashes = {k: content_hashes(keyed[k]) for k in keys}
+    seen = select_seen_hashes(conn, keys)
     new_keys = [k for k in keys if k not in seen]
     existing_keys = [k for k in keys if k in seen]
+    todays_keys = [k for k in existing_keys if seen[k][0] == today]
 
-    uniques = [keyed[k] for k in new_keys]
-    already_seen = len(existing_keys)
+    uniques = [keyed[k] for k in new_keys + todays_keys]
+    already_seen = len(existing_keys) - len(todays_keys)
+
+    # Only keys whose whole-record hash differs need their field hashes read back.
+    rehash = {k: hashes[k] for k in existing_keys if seen[k][1] != hashes[k][0]}
+    stored_fields = select_field_hashes(conn, [k for k in rehash if seen[k][1] is not None])
+    changes = []
+    for k, (_, fields) in rehash.items():
+        old = stored_fields.get(k)
+        if old is None or seen[k][0] == today:
+            continue  # baseline hash only, or today's processed output already has this version
+        changed = [f for f in CDC_FIELDS if f in old and old[f] != fields[f]]
+        if changed:
+            changes.append((keyed[k], changed))
 
     with conn:
-        inserted = insert_new_keys(conn, new_keys, today)
+        inserted = insert_new_keys(conn, new_keys, today, hashes)
         updated = update_existing_keys(conn, existing_keys, today)
+        update_content_hashes(conn, rehash)
 
     stats = {
         "already_seen": already_seen,
         "inserted": inserted,
         "updated": updated,
         "touched": inserted + updated,
+        "uniques": len(uniques),
+        "changed": len(changes),
     }
     logger.info(
-        f"Seen upsert: inserted={inserted}, updated={updated}, uniques={len(uniques)}"
+        f"Seen upsert: inserted={inserted}, updated={updated}, uniques={len(uniques)}, changed={len(changes)}"
     )
-    return uniques, stats
\ No newline at end of file
+    return uniques, changes, stats
+
+def _key_digest(job_key: str) -> bytes:
+    return hashlib.blake2b(job_key.encode("utf-8"), digest_size=SNAPSHOT_KEY_BYTES).digest()
+
+def export_seen_snapshot(conn: sqlite3.Connection, path: str | Path = SEEN_SNAPSHOT_PATH) -> int:
+    """
+    Write every job_key in job_seen to a sorted, fixed-width snapshot file for
+    SeenSnapshot. The file is replaced atomically, so readers that already have
+    the old one mapped keep a consistent view. Returns the number of keys written.
+    """
+    digests = sorted(_key_digest(k) for (k,) in conn.execute("SELECT job_key FROM job_seen"))
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with tmp.open("wb") as f:
+        f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, len(digests)))
+        f.write(b"".join(digests))
+    os.replace(tmp, path)
+
+    logger.info(f"Seen snapshot: wrote {len(digests)} keys to {path}")
+    return len(digests)
+
+
+class SeenSnapshot:
+    """
+    Read-only, memory-mapped view of the seen keys written by export_seen_snapshot.
+
+    Membership checks need no database connection: the mapped digests are
+    viewed in place as a sorted numpy array and batches are resolved with one
+    vectorized binary search. The snapshot reflects job_seen as of the last
+    export, i.e. the end of the last run's upsert.
+    """
+
+    def __init__(self, path: str | Path = SEEN_SNAPSHOT_PATH):
+        self.path = Path(path)
+        with self.path.open("rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, count = SNAPSHOT_HEADER.unpack_from(self._mm)
+        if magic != SNAPSHOT_MAGIC or len(self._mm) != SNAPSHOT_HEADER.size + count * SNAPSHOT_KEY_BYTES:
+            self._mm.close()
+            raise ValueError(f"Not a valid seen-key snapshot: {self.path}")
+
+        # Zero-copy view over the mapped file; fixed-width bytes compare like the
+        # sorted() order used at export.
+        self._keys = np.frombuffer(self._mm, dtype=SNAPSHOT_DTYPE, count=count, offset=SNAPSHOT_HEADER.size)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _present(self, digests: np.ndarray) -> np.ndarray:
+        if not len(self._keys) or not len(digests):
+            return np.zeros(len(digests), dtype=bool)
+        idx = np.searchsorted(self._keys, digests)
+        np.minimum(idx, len(self._keys) - 1, out=idx)
+        return self._keys[idx] == digests
+
+    def __contains__(self, job_key: str) -> bool:
+        if not job_key:
+            return False
+        return bool(self._present(np.array([_key_digest(job_key)], dtype=SNAPSHOT_DTYPE))[0])
+
+    def contains_many(self, job_keys: list[str]) -> set[str]:
+        """Return the subset of job_keys present in the snapshot (cf. select_seen)."""
+        keys = [k for k in job_keys if k]
+        digests = np.frombuffer(b"".join(_key_digest(k) for k in keys), dtype=SNAPSHOT_DTYPE)
+        # Searching in sorted order keeps the probes into the map cache-friendly.
+        order = np.argsort(digests)
+        hits = order[self._present(digests[order])]
+        return {keys[i] for i in hits.tolist()}
+
+    def close(self):
+        # Drop the array view first; an mmap with live exports cannot be closed.
+        self._keys = None
+        self._mm.close()
+
+    def __enter__(self) -> "SeenSnapshot":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
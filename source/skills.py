@@ -0,0 +1,302 @@
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import argparse
+import json
+import os
+import re
+import sys
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from source.config_loader import load_skill_taxonomy
+from source.logger import get_logger
+from source.records import JobRecord
+from source.storage import PROCESSED_DIR, TAG_KEYS
+
+logger = get_logger()
+
+TITLE_CATEGORIES = {"seniority"}
+CONTEXT_KEY = "contexts"  # taxonomy section of context-gated aliases, not a category
+CONTEXT_WINDOW = 40
+TAG_COLUMNS = TAG_KEYS
+YEARS_COLUMN = "experience_years_min"
+
+# "5+ years", "3-5 years", "7 plus yrs", "2 to 4 years"; the lower bound is kept.
+YEARS_RE = re.compile(
+    r"(?<!\d)(\d{1,2})\s*(?:\+|plus)?\s*(?:(?:-|–|to)\s*\d{1,2}\s*\+?\s*)?(?:years?|yrs?)\b"
+)
+MAX_YEARS = 30
+# A years match only counts as required experience when it is followed by
+# "of"/"in" ("5+ years of Python") or "experience" appears in the same clause,
+# so "founded 25 years ago" is ignored.
+YEARS_FOLLOWUP_RE = re.compile(r"\s*'?\s*(?:of|in)\s")
+EXPERIENCE_RE = re.compile(r"\b(?:experience|experienced|exp)\b")
+EXPERIENCE_WINDOW = 60
+CLAUSE_BREAK_RE = re.compile(r"[.;\n]")
+
+# Pinned tagging behavior on ambiguous text: (title, body, expected columns).
+# `python -m source.skills --check` asserts them against the live taxonomy.
+TAGGING_EXAMPLES = [
+    ("Data Scientist", "Python, R and SQL required.", {"tools": ["python", "r", "sql"]}),
+    ("Data Scientist", "Join our R&D team.", {"tools": []}),
+    ("Data Analyst", "Proficiency with MS Office; BS required.", {"degrees": [], "tools": []}),
+    ("Data Scientist", "BS/MS in Statistics, MS/PhD preferred.", {"degrees": ["bachelors", "masters", "phd"]}),
+    ("Data Scientist", "You will excel at communicating results.", {"tools": []}),
+    ("Data Analyst", "Advanced Excel and SQL.", {"tools": ["excel", "sql"]}),
+    ("Associate Director, Data Science", "", {"seniority": ["manager"]}),
+    ("Associate Data Scientist", "", {"seniority": []}),
+    ("Data Scientist", "Founded 25 years ago, we build analytics tools.", {YEARS_COLUMN: None}),
+    ("Data Scientist", "Founded 25 years ago. 3+ years of Python.", {YEARS_COLUMN: 3}),
+    ("Data Scientist", "Experience: 5-7 years in analytics.", {YEARS_COLUMN: 5}),
+]
+
+# Whole-word boundaries that also treat "+", "#" and "&" as word characters,
+# so "c++" is matched as one token and "r" never matches inside "rnn" or "r&d".
+_LEFT = r"(?<![\w+#&])"
+_RIGHT = r"(?![\w+#&])"
+
+
+def _trie_pattern(node: dict) -> str:
+    """Render a character trie as a regex with shared prefixes factored out."""
+    end = "" in node
+    branches = []
+    for ch in sorted(k for k in node if k):
+        atom = r"\s+" if ch == " " else re.escape(ch)
+        branches.append(atom + _trie_pattern(node[ch]))
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    return f"(?:{body})?" if end else body
+
+
+class KeywordMatcher:
+    """
+    Multi-pattern whole-word matcher compiled from taxonomy aliases.
+
+    All aliases are merged into a single trie-shaped regex, so each text is
+    scanned once regardless of how many aliases the taxonomy holds. Aliases in
+    `contexts` only count when their regex matches the text around the hit.
+    """
+
+    __slots__ = ("pattern", "lookup", "contexts")
+
+    def __init__(
+        self,
+        categories: dict[str, dict[str, list[str]]],
+        contexts: dict[str, str] | None = None,
+    ):
+        self.contexts = {alias.lower(): re.compile(rx) for alias, rx in (contexts or {}).items()}
+        self.lookup: dict[str, tuple[str, str]] = {}
+        trie: dict = {}
+        for category, tags in categories.items():
+            for tag, aliases in (tags or {}).items():
+                for alias in aliases or []:
+                    alias = " ".join(str(alias).lower().split())
+                    if not alias:
+                        continue
+                    self.lookup.setdefault(alias, (category, tag))
+                    node = trie
+                    for ch in alias:
+                        node = node.setdefault(ch, {})
+                    node[""] = {}
+        self.pattern = re.compile(_LEFT + _trie_pattern(trie) + _RIGHT) if trie else None
+
+    def find(self, text: str) -> set[tuple[str, str]]:
+        """Return the (category, tag) pairs whose aliases occur in text."""
+        if not text or self.pattern is None:
+            return set()
+        found = set()
+        text = text.lower()
+        for match in self.pattern.finditer(text):
+            alias = " ".join(match.group().split())
+            hit = self.lookup.get(alias)
+            if not hit:
+                continue
+            context = self.contexts.get(alias)
+            if context is not None:
+                window = text[max(0, match.start() - CONTEXT_WINDOW):match.end() + CONTEXT_WINDOW]
+                if not context.search(window):
+                    continue
+            found.add(hit)
+        return found
+
+
+def build_matchers(taxonomy: dict) -> tuple[KeywordMatcher, KeywordMatcher]:
+    """Compile (text_matcher, title_matcher) from a loaded taxonomy."""
+    contexts = taxonomy.get(CONTEXT_KEY) or {}
+    categories = {c: t for c, t in taxonomy.items() if c != CONTEXT_KEY}
+    text_cats = {c: t for c, t in categories.items() if c not in TITLE_CATEGORIES}
+    title_cats = {c: t for c, t in categories.items() if c in TITLE_CATEGORIES}
+    return KeywordMatcher(text_cats, contexts), KeywordMatcher(title_cats, contexts)
+
+
+def _highlight_items(highlights) -> list[str]:
+    """Return highlight item strings from a list or its JSON-encoded form."""
+    if not highlights:
+        return []
+    if isinstance(highlights, str):
+        try:
+            highlights = json.loads(highlights)
+        except json.JSONDecodeError:
+            return [highlights]
+    items = []
+    for block in highlights:
+        if isinstance(block, dict):
+            items.extend(str(i) for i in block.get("items") or [])
+    return items
+
+
+def _record_texts(rec: dict) -> tuple[str, str]:
+    body = "\n".join([rec.get("description_raw") or "", *_highlight_items(rec.get("job_highlights_raw"))])
+    return rec.get("title") or "", body
+
+
+def _is_experience(text: str, match: re.Match) -> bool:
+    if YEARS_FOLLOWUP_RE.match(text, match.end()):
+        return True
+    before = CLAUSE_BREAK_RE.split(text[max(0, match.start() - EXPERIENCE_WINDOW):match.start()])[-1]
+    after = CLAUSE_BREAK_RE.split(text[match.end():match.end() + EXPERIENCE_WINDOW], maxsplit=1)[0]
+    return bool(EXPERIENCE_RE.search(before) or EXPERIENCE_RE.search(after))
+
+
+def _min_years(text: str) -> int | None:
+    text = text.lower()
+    years = [
+        int(m.group(1)) for m in YEARS_RE.finditer(text)
+        if 0 < int(m.group(1)) <= MAX_YEARS and _is_experience(text, m)
+    ]
+    return min(years) if years else None
+
+
+def extract_tags(title: str, body: str, matchers: tuple[KeywordMatcher, KeywordMatcher]) -> dict:
+    """Return tag columns for one posting given its title and body text."""
+    text_matcher, title_matcher = matchers
+    tags = {col: [] for col in TAG_COLUMNS}
+    for category, tag in text_matcher.find(body) | title_matcher.find(title):
+        if category in tags:
+            tags[category].append(tag)
+    for col in tags:
+        tags[col].sort()
+    tags[YEARS_COLUMN] = _min_years(body)
+    return tags
+
+
+def check_examples(matchers: tuple[KeywordMatcher, KeywordMatcher]) -> list[str]:
+    """Return a description of every TAGGING_EXAMPLES case the matchers get wrong."""
+    failures = []
+    for title, body, expected in TAGGING_EXAMPLES:
+        tags = extract_tags(title, body, matchers)
+        for col, want in expected.items():
+            if tags[col] != want:
+                failures.append(f"{title!r} / {body!r}: {col} expected {want!r}, got {tags[col]!r}")
+    return failures
+
+
+def tag_batch(records: list[JobRecord], matchers: tuple[KeywordMatcher, KeywordMatcher]) -> list[JobRecord]:
+    """Add skill/tool/degree/seniority tag columns to normalized records in place."""
+    for rec in records:
+        rec.update(extract_tags(*_record_texts(rec), matchers))
+    logger.info(f"Tagged {len(records)} records with taxonomy keywords")
+    return records
+
+
+# ---------- PARALLEL / BACKFILL ----------
+_worker_matchers = None
+
+def _init_worker(taxonomy: dict):
+    global _worker_matchers
+    _worker_matchers = build_matchers(taxonomy)
+
+
+def _tag_chunk(texts: list[tuple[str, str]]) -> list[dict]:
+    return [extract_tags(title, body, _worker_matchers) for title, body in texts]
+
+
+def tag_batch_parallel(
+    records: list[JobRecord],
+    taxonomy: dict,
+    processes: int | None = None,
+    chunk_size: int = 500,
+) -> list[JobRecord]:
+    """Same as tag_batch, but fan the matching out over a process pool."""
+    texts = [_record_texts(r) for r in records]
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+    with ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(taxonomy,)) as ex:
+        offset = 0
+        for tags in ex.map(_tag_chunk, chunks):
+            for rec, rec_tags in zip(records[offset:offset + len(tags)], tags):
+                rec.update(rec_tags)
+            offset += len(tags)
+    logger.info(f"Tagged {len(records)} records with taxonomy keywords ({processes or os.cpu_count()} processes)")
+    return records
+
+
+def _backfill_file(path: str) -> int:
+    """Recompute tag columns for one processed Parquet file and rewrite it atomically."""
+    table = pq.read_table(path)
+    cols = set(table.column_names)
+    titles = table.column("title").to_pylist() if "title" in cols else [None] * table.num_rows
+    descs = table.column("description_raw").to_pylist() if "description_raw" in cols else [None] * table.num_rows
+    highs = table.column("job_highlights_raw").to_pylist() if "job_highlights_raw" in cols else [None] * table.num_rows
+
+    rows = [
+        extract_tags(*_record_texts({"title": t, "description_raw": d, "job_highlights_raw": h}), _worker_matchers)
+        for t, d, h in zip(titles, descs, highs)
+    ]
+    for col in TAG_COLUMNS:
+        values = pa.array([r[col] for r in rows], type=pa.list_(pa.string()))
+        table = table.drop_columns([col]) if col in cols else table
+        table = table.append_column(col, values)
+    years = pa.array([r[YEARS_COLUMN] for r in rows], type=pa.int64())
+    table = table.drop_columns([YEARS_COLUMN]) if YEARS_COLUMN in cols else table
+    table = table.append_column(YEARS_COLUMN, years)
+
+    tmp = f"{path}.tmp"
+    pq.write_table(table, tmp)
+    os.replace(tmp, path)
+    return table.num_rows
+
+
+def backfill_processed(
+    processed_dir: str | Path = PROCESSED_DIR,
+    processes: int | None = None,
+    taxonomy: dict | None = None,
+) -> int:
+    """Re-tag every processed Parquet file, one file per worker process."""
+    taxonomy = taxonomy if taxonomy is not None else load_skill_taxonomy()
+    paths = [str(p) for p in sorted(Path(processed_dir).glob("jobs_*.parquet"))]
+    if not paths:
+        logger.info(f"No processed Parquet files found in {processed_dir}")
+        return 0
+    with ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(taxonomy,)) as ex:
+        total = sum(ex.map(_backfill_file, paths))
+    logger.info(f"Backfilled tags for {total} rows across {len(paths)} files")
+    return total
+
+
+def main(argv: list[str] | None = None) -> int:
+    """CLI: `python -m source.skills --check` or `--backfill [--processes N]`."""
+    parser = argparse.ArgumentParser(description="Taxonomy keyword tagging for processed job postings.")
+    parser.add_argument("--backfill", action="store_true", help="Re-tag every file in data/processed.")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--check", action="store_true",
+                        help="Assert the pinned TAGGING_EXAMPLES against the taxonomy.")
+    args = parser.parse_args(argv)
+
+    if not args.backfill and not args.check:
+        parser.error("nothing to do (pass --check or --backfill)")
+    if args.check:
+        failures = check_examples(build_matchers(load_skill_taxonomy()))
+        for failure in failures:
+            print(f"FAIL {failure}")
+        print(f"Tagging examples: {len(TAGGING_EXAMPLES) - len(failures)}/{len(TAGGING_EXAMPLES)} cases pass")
+        if failures:
+            return 1
+    if args.backfill:
+        backfill_processed(processes=args.processes)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,18 @@
+from contextlib import contextmanager
 from pathlib import Path
-from datetime import date
+from datetime import date, datetime, timezone
+from typing import Callable
+import fcntl
+import json
 import sqlite3
 
+from source.logger import get_logger
+
+logger = get_logger()
+
 DEFAULT_STATE_DB = "data/state/run_state.sqlite"
+DEFAULT_QUOTA_LOCK = "data/state/quota.lock"
+ACCOUNT_SNAPSHOT_MAX_AGE_S = 6 * 3600
 
 SCHEMA = """
 CREATE TABLE IF NOT EXISTS run_state (
@@ -11,6 +21,27 @@ CREATE TABLE IF NOT EXISTS run_state (
 );
 """
 
+# One row per fetched page, committed as soon as the page arrives, so a crashed
+# run can be resumed from the last next_page_token without re-spending quota.
+CHECKPOINT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scrape_page (
+    run_date        DATE NOT NULL,
+    page            INTEGER NOT NULL,
+    next_page_token TEXT,
+    jobs            TEXT NOT NULL,
+    PRIMARY KEY (run_date, page)
+);
+"""
+
+# Today's request allowance, shared by every process/worker via QuotaBucket.
+QUOTA_SCHEMA = """
+CREATE TABLE IF NOT EXISTS quota_bucket (
+    run_date DATE PRIMARY KEY,
+    capacity INTEGER NOT NULL,
+    drawn    INTEGER NOT NULL DEFAULT 0
+);
+"""
+
 DEFAULTS_SQL = """
 INSERT OR IGNORE INTO run_state (key, value) VALUES
 ('last_reset', ?),
@@ -27,6 +58,8 @@ def open_state_db(today: str, db_path: str | Path = DEFAULT_STATE_DB) -> sqlite3
     conn.execute("PRAGMA synchronous=NORMAL;")
 
     conn.execute(SCHEMA)
+    conn.executescript(CHECKPOINT_SCHEMA)
+    conn.executescript(QUOTA_SCHEMA)
     conn.execute(DEFAULTS_SQL, (today,))
     conn.commit()
     return conn
@@ -64,4 +97,192 @@ def update_carryover(conn: sqlite3.Connection, carryover: int):
         conn.execute(
             "UPDATE run_state SET value=? WHERE key='carryover_requests'",
             (str(carryover),),
-        )
\ No newline at end of file
+        )
+
+
+def save_checkpoint_page(
+    conn: sqlite3.Connection,
+    run_date: str,
+    page: int,
+    jobs: list[dict],
+    next_page_token: str | None,
+):
+    """Durably store one fetched page and the token that follows it."""
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO scrape_page (run_date, page, next_page_token, jobs) VALUES (?, ?, ?, ?)",
+            (run_date, page, next_page_token, json.dumps(jobs, ensure_ascii=False)),
+        )
+
+
+def load_checkpoint(conn: sqlite3.Connection, run_date: str) -> dict:
+    """
+    Return what was already fetched for run_date:
+    pages (successful requests already spent), jobs, next_page_token to
+    resume from, and exhausted (True if pagination ended).
+    """
+    rows = conn.execute(
+        "SELECT page, next_page_token, jobs FROM scrape_page WHERE run_date=? ORDER BY page",
+        (run_date,),
+    ).fetchall()
+
+    jobs = []
+    for _, _, page_jobs in rows:
+        jobs.extend(json.loads(page_jobs))
+    last_token = rows[-1][1] if rows else None
+
+    return {
+        "pages": len(rows),
+        "jobs": jobs,
+        "next_page_token": last_token,
+        "exhausted": bool(rows) and not last_token,
+    }
+
+
+def clear_checkpoints(conn: sqlite3.Connection, before: str):
+    """Delete checkpoints for run dates earlier than `before`."""
+    with conn:
+        conn.execute("DELETE FROM scrape_page WHERE run_date < ?", (before,))
+        conn.execute("DELETE FROM quota_bucket WHERE run_date < ?", (before,))
+
+
+# ---------- QUOTA (cross-process) ----------
+@contextmanager
+def quota_lock(lock_path: str | Path = DEFAULT_QUOTA_LOCK):
+    """Exclusive advisory file lock serializing quota decisions across processes."""
+    path = Path(lock_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _load_account_snapshot(conn: sqlite3.Connection) -> dict | None:
+    row = conn.execute("SELECT value FROM run_state WHERE key='account_snapshot'").fetchone()
+    if not row:
+        return None
+    try:
+        return json.loads(row[0])
+    except json.JSONDecodeError:
+        return None
+
+
+def _store_account_snapshot(conn: sqlite3.Connection, snapshot: dict):
+    conn.execute(
+        "INSERT OR REPLACE INTO run_state (key, value) VALUES ('account_snapshot', ?)",
+        (json.dumps(snapshot),),
+    )
+
+
+def get_account_snapshot(
+    conn: sqlite3.Connection,
+    fetch: Callable[[], tuple[int, int, int]],
+    today: str,
+    max_age_s: float = ACCOUNT_SNAPSHOT_MAX_AGE_S,
+    lock_path: str | Path = DEFAULT_QUOTA_LOCK,
+) -> tuple[int, int, int]:
+    """
+    Return (quota, remaining, used), calling `fetch` (the /account endpoint)
+    only when the cached snapshot is missing, from an earlier day, or older
+    than max_age_s. Requests drawn since are already reflected in the cache.
+    """
+    with quota_lock(lock_path):
+        snap = _load_account_snapshot(conn)
+        now = datetime.now(timezone.utc)
+        if snap:
+            fetched_at = datetime.fromisoformat(snap["fetched_at"])
+            age = (now - fetched_at).total_seconds()
+            if snap.get("date") == today and age <= max_age_s:
+                logger.info(f"Using cached account snapshot ({age:.0f}s old)")
+                return snap["quota"], snap["remaining"], snap["used"]
+
+        quota, remaining, used = fetch()
+        with conn:
+            _store_account_snapshot(conn, {
+                "date": today,
+                "fetched_at": now.isoformat(timespec="seconds"),
+                "quota": quota,
+                "remaining": remaining,
+                "used": used,
+            })
+        return quota, remaining, used
+
+
+class QuotaBucket:
+    """
+    Today's request allowance, shared by every process that scrapes.
+
+    The capacity is set once per day (by whoever gets there first, under the
+    file lock) and every request must `draw` a token before it is sent, so
+    overlapping runs or parallel workers cannot overspend the cap together.
+    Draws also debit the cached account snapshot so it stays current between
+    /account reconciliations.
+    """
+
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        run_date: str,
+        lock_path: str | Path = DEFAULT_QUOTA_LOCK,
+    ):
+        self.conn = conn
+        self.run_date = run_date
+        self.lock_path = lock_path
+
+    def ensure_capacity(self, compute_cap: Callable[[], int]) -> int:
+        """Return today's capacity, computing and storing it only if no process has yet."""
+        with quota_lock(self.lock_path):
+            row = self.conn.execute(
+                "SELECT capacity FROM quota_bucket WHERE run_date=?", (self.run_date,)
+            ).fetchone()
+            if row:
+                return row[0]
+            cap = compute_cap()
+            with self.conn:
+                self.conn.execute(
+                    "INSERT INTO quota_bucket (run_date, capacity, drawn) VALUES (?, ?, 0)",
+                    (self.run_date, cap),
+                )
+            return cap
+
+    def _adjust(self, delta: int) -> int:
+        """Move `delta` tokens out of (positive) or back into (negative) the bucket."""
+        with quota_lock(self.lock_path):
+            row = self.conn.execute(
+                "SELECT capacity, drawn FROM quota_bucket WHERE run_date=?", (self.run_date,)
+            ).fetchone()
+            if not row:
+                return 0
+            capacity, drawn = row
+            delta = min(delta, capacity - drawn) if delta > 0 else max(delta, -drawn)
+            if delta == 0:
+                return 0
+            with self.conn:
+                self.conn.execute(
+                    "UPDATE quota_bucket SET drawn=drawn+? WHERE run_date=?",
+                    (delta, self.run_date),
+                )
+                snap = _load_account_snapshot(self.conn)
+                if snap and snap.get("date") == self.run_date:
+                    snap["remaining"] = max(0, snap["remaining"] - delta)
+                    snap["used"] = snap["used"] + delta
+                    _store_account_snapshot(self.conn, snap)
+            return delta
+
+    def draw(self, n: int = 1) -> int:
+        """Take up to n request tokens; returns how many were granted (0 when empty)."""
+        return self._adjust(n)
+
+    def refund(self, n: int = 1):
+        """Return tokens for requests that were drawn but never charged (e.g. failed)."""
+        self._adjust(-n)
+
+    def status(self) -> tuple[int, int]:
+        """Return (capacity, drawn) for today, (0, 0) if the bucket is not set up."""
+        row = self.conn.execute(
+            "SELECT capacity, drawn FROM quota_bucket WHERE run_date=?", (self.run_date,)
+        ).fetchone()
+        return (row[0], row[1]) if row else (0, 0)
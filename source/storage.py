@@ -1,44 +1,414 @@
 from pathlib import Path
+from datetime import date, datetime, timedelta, timezone
+import argparse
+import hashlib
 import json
+import os
+import sqlite3
+import uuid
+import zlib
 import pyarrow as pa
 import pyarrow.parquet as pq
 
 from source.logger import get_logger
+from source.records import JobRecord
+from source.seen_store import CDC_FIELDS
 
 logger = get_logger()
 
 RAW_DIR = Path("data/raw")
 PROCESSED_DIR = Path("data/processed")
-RAW_TEMPLATE = "raw_jobs_{date}.json"
+RAW_TEMPLATE = "raw_jobs_{date}.json"  # legacy one-file-per-day layout (read-only)
+BLOB_DIR = "blobs"
+MANIFEST_DIR = "manifests"
+# Every run writes its own pack and changes file, never one a previous run may
+# have uploaded: CI syncs only data/state down, so a same-day rerun on a fresh
+# runner does not have the earlier run's files and `aws s3 sync` would replace them.
+PACK_TEMPLATE = "pack_{date}_{run}.bin"
+MANIFEST_TEMPLATE = "raw_jobs_{date}.json"
+DEFAULT_BLOB_INDEX = "data/state/raw_blobs.sqlite"
+# Multi-KB fields that repeat unchanged while a posting stays up; stored apart
+# from the rest of the job, whose "posted_at"-style fields change daily.
+RAW_BODY_KEYS = ("description", "job_highlights")
+# zlib preset dictionary of common SerpApi job JSON, so small per-job blobs
+# compress well on their own. Blobs depend on it byte-for-byte: never edit it,
+# add a new version to RAW_ZDICTS instead (each blob records the version used).
+RAW_ZDICTS = {
+    1: (
+        '{"title":"Data Scientist","company_name":"","location":"New York, NY","via":"via LinkedIn",'
+        '"share_link":"https://www.google.com/search?ibp=htl;jobs&q=data+scientist#htidocid=",'
+        '"thumbnail":"https://encrypted-tbn0.gstatic.com/images?q=tbn:",'
+        '"extensions":["days ago","hours ago","Full-time","Part-time","Contractor","Health insurance",'
+        '"Dental insurance","Paid time off","Work from home"],'
+        '"detected_extensions":{"posted_at":"days ago","schedule_type":"Full-time","health_insurance":true,'
+        '"dental_coverage":true,"paid_time_off":true,"work_from_home":true,"salary":"K a year"},'
+        '"description":null,"job_highlights":[{"title":"Qualifications","items":[""]},'
+        '{"title":"Benefits","items":[""]},{"title":"Responsibilities","items":[""]}],'
+        '"apply_options":[{"title":"LinkedIn","link":"https://www.linkedin.com/jobs/view/"},'
+        '{"title":"Indeed","link":"https://www.indeed.com/viewjob?jk="},'
+        '{"title":"Glassdoor","link":"https://www.glassdoor.com/job-listing/"},'
+        '{"title":"ZipRecruiter","link":"https://www.ziprecruiter.com/c/"}],'
+        '"job_id":"eyJqb2JfdGl0bGUiOiJEYXRhIFNjaWVudGlzdCIsImNvbXBhbnlfbmFtZSI6I"}'
+    ).encode("utf-8"),
+}
+RAW_ZDICT_VERSION = 1
 PARQUET_TEMPLATE = "jobs_{date}.parquet"
 NESTED_KEYS = ["job_metadata_raw", "job_highlights_raw", "apply_options_raw", "extras"]
+TAG_KEYS = ["skills", "tools", "degrees", "seniority"]
+PARQUET_BATCH_ROWS = 2000
+CHANGES_DIR = PROCESSED_DIR / "changes"
+CHANGES_TEMPLATE = "changes_{date}_{run}.parquet"
 
-def _to_parquet_row(rec: dict) -> dict:
-    row = dict(rec)
-    for k in NESTED_KEYS:
-        v = row.get(k)
-        if v in (None, {}, []):
-            row[k] = None
+# Only body blobs are indexed: heads change daily ("posted_at", "extensions"),
+# never dedupe across days, and are simply rewritten into each run's pack.
+# The index is synced with data/state on every CI run, so rows stay small:
+# raw 16-byte hashes in a WITHOUT ROWID table and an integer pack id. Bodies
+# from packs older than BLOB_INDEX_RETENTION_DAYS are forgotten, so the file
+# stops growing; a posting still up after that gets its body stored once more.
+BLOB_INDEX_RETENTION_DAYS = 60
+BLOB_INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS raw_pack (
+    id   INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    day  DATE NOT NULL
+);
+CREATE TABLE IF NOT EXISTS raw_body (
+    hash   BLOB PRIMARY KEY,
+    pack   INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    zdict  INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+PARQUET_SCHEMA = pa.schema(
+    [
+        (name, pa.list_(pa.string()) if name in TAG_KEYS
+         else pa.int64() if name == "experience_years_min"
+         else pa.string())
+        for name in JobRecord.__slots__
+    ]
+)
+
+# One row per re-seen posting whose content changed: only the changed fields
+# carry their new value, the rest are null.
+CHANGES_SCHEMA = pa.schema(
+    [
+        ("job_key", pa.string()),
+        ("scrape_date", pa.string()),
+        ("job_id", pa.string()),
+        ("changed_fields", pa.list_(pa.string())),
+        *((name, pa.string()) for name in CDC_FIELDS),
+    ]
+)
+
+def _nested_to_json(v) -> str | None:
+    if v in (None, {}, []):
+        return None
+    return json.dumps(v, ensure_ascii=False)
+
+def _to_record_batch(records: list[JobRecord]) -> pa.RecordBatch:
+    """Build one Arrow batch column-by-column straight from record attributes."""
+    columns = []
+    for field in PARQUET_SCHEMA:
+        if field.name in NESTED_KEYS:
+            values = [_nested_to_json(getattr(r, field.name)) for r in records]
         else:
-            row[k] = json.dumps(v, ensure_ascii=False)
-    return row
-
-def save_raw_json(records: list[dict], run_date: str) -> Path:
-    """Save raw API results as JSON.""" #  no validation here
-    RAW_DIR.mkdir(parents=True, exist_ok=True)
-    path = RAW_DIR / RAW_TEMPLATE.format(date=run_date)
-    with path.open("w", encoding="utf-8") as f:
-        json.dump(records, f, ensure_ascii=False, indent=2)
-    logger.info(f"Saved raw JSON to {path}")
+            values = [getattr(r, field.name) for r in records]
+        columns.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(columns, schema=PARQUET_SCHEMA)
+
+def _blob_hash(payload: bytes) -> str:
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+def _canonical_json(obj) -> bytes:
+    # Key order is kept (not sorted) so a rebuilt job matches the API response.
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def _compress_blob(payload: bytes, zdict_version: int) -> bytes:
+    c = zlib.compressobj(6, zdict=RAW_ZDICTS[zdict_version])
+    return c.compress(payload) + c.flush()
+
+def _decompress_blob(blob: bytes, zdict_version: int) -> bytes:
+    d = zlib.decompressobj(zdict=RAW_ZDICTS[zdict_version])
+    return d.decompress(blob) + d.flush()
+
+def _split_raw_job(job: dict) -> tuple[dict, dict | None]:
+    """
+    Split a raw job into a small head and a large, day-to-day stable body.
+    Body keys stay in the head as None placeholders so key order survives a rebuild.
+    """
+    body = {k: job[k] for k in RAW_BODY_KEYS if k in job}
+    if not body:
+        return job, None
+    head = {k: (None if k in body else v) for k, v in job.items()}
+    return head, body
+
+def open_blob_index(db_path: str | Path = DEFAULT_BLOB_INDEX) -> sqlite3.Connection:
+    """
+    Open (and initialize if needed) the SQLite index of stored raw blobs.
+    Lives with the other state DBs so dedup works even when data/raw is not synced down.
+    """
+    path = Path(db_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+
+    conn.execute("PRAGMA journal_mode=WAL;")
+    conn.execute("PRAGMA synchronous=NORMAL;")
+
+    conn.executescript(BLOB_INDEX_SCHEMA)
+    legacy = conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='raw_blob'").fetchone()
+    if legacy:
+        # The first layout indexed heads too, with hex hashes and pack names.
+        # Manifests are self-contained, so dropping it only means live bodies
+        # are written once more.
+        conn.execute("DROP TABLE raw_blob")
+        conn.commit()
+        conn.execute("VACUUM")
+        logger.info("Blob index: dropped the legacy raw_blob table")
+    conn.commit()
+
+    return conn
+
+def _prune_blob_index(conn: sqlite3.Connection, run_date: str):
+    cutoff = (date.fromisoformat(run_date) - timedelta(days=BLOB_INDEX_RETENTION_DAYS)).isoformat()
+    old = "SELECT id FROM raw_pack WHERE day < ?"
+    conn.execute(f"DELETE FROM raw_body WHERE pack IN ({old})", (cutoff,))
+    conn.execute("DELETE FROM raw_pack WHERE day < ?", (cutoff,))
+
+def new_run_id() -> str:
+    """
+    Return a unique id for one run's own output files. It starts with the full
+    UTC start time, so a day's files sort in run order even when local runs
+    with the same date fall on both sides of UTC midnight.
+    """
+    return f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S%f}-{uuid.uuid4().hex[:8]}"
+
+def save_raw_jobs(
+    records: list[dict],
+    run_date: str,
+    index_conn: sqlite3.Connection | None = None,
+    raw_dir: str | Path | None = None,
+    run_id: str | None = None,
+) -> Path:
+    """
+    Save raw API results into the content-addressed raw store.
+
+    Payloads are zlib-compressed into a new pack owned by this run
+    (`blobs/pack_{date}_{run}.bin`), which is created exclusively and never
+    appended to later. Bodies are stored once across days via the blob index;
+    heads are stored once per run. The day gets a manifest listing its jobs as
+    blob hashes plus where each blob lives. Returns the manifest path.
+    """
+    raw_dir = Path(raw_dir) if raw_dir is not None else RAW_DIR
+    own_conn = index_conn is None
+    conn = open_blob_index() if own_conn else index_conn
+    try:
+        (raw_dir / BLOB_DIR).mkdir(parents=True, exist_ok=True)
+        (raw_dir / MANIFEST_DIR).mkdir(parents=True, exist_ok=True)
+        pack_name = PACK_TEMPLATE.format(date=run_date, run=run_id or new_run_id())
+        pack_path = raw_dir / BLOB_DIR / pack_name
+
+        jobs = []
+        payloads = {}
+        bodies = set()
+        for job in records:
+            refs = []
+            for part_idx, part in enumerate(_split_raw_job(job)):
+                if part is None:
+                    refs.append(None)
+                    continue
+                payload = _canonical_json(part)
+                h = _blob_hash(payload)
+                payloads.setdefault(h, payload)
+                if part_idx == 1:
+                    bodies.add(h)
+                refs.append(h)
+            jobs.append(refs)
+        blob_pos = {h: i for i, h in enumerate(payloads)}
+
+        known = {}
+        body_hashes = [bytes.fromhex(h) for h in bodies]
+        for i in range(0, len(body_hashes), 800):
+            part = body_hashes[i:i + 800]
+            q = ",".join("?" * len(part))
+            rows = conn.execute(
+                "SELECT b.hash, p.name, b.offset, b.length, b.zdict FROM raw_body b "
+                f"JOIN raw_pack p ON p.id = b.pack WHERE b.hash IN ({q})", part
+            ).fetchall()
+            known.update((h.hex(), [p, o, n, z]) for h, p, o, n, z in rows)
+
+        new_rows = []
+        written = 0
+        new_payloads = [(h, payload) for h, payload in payloads.items() if h not in known]
+        if new_payloads:
+            with pack_path.open("xb") as f:
+                offset = 0
+                for h, payload in new_payloads:
+                    blob = _compress_blob(payload, RAW_ZDICT_VERSION)
+                    f.write(blob)
+                    known[h] = [pack_name, offset, len(blob), RAW_ZDICT_VERSION]
+                    if h in bodies:
+                        new_rows.append((bytes.fromhex(h), offset, len(blob), RAW_ZDICT_VERSION))
+                    offset += len(blob)
+                    written += len(blob)
+                f.flush()
+                os.fsync(f.fileno())
+        with conn:
+            if new_rows:
+                pack_id = conn.execute(
+                    "INSERT INTO raw_pack (name, day) VALUES (?, ?)", (pack_name, run_date)
+                ).lastrowid
+                conn.executemany(
+                    "INSERT OR IGNORE INTO raw_body (hash, pack, offset, length, zdict) VALUES (?, ?, ?, ?, ?)",
+                    [(h, pack_id, *rest) for h, *rest in new_rows],
+                )
+            _prune_blob_index(conn, run_date)
+
+        packs = sorted({known[h][0] for h in payloads})
+        pack_pos = {p: i for i, p in enumerate(packs)}
+        manifest = {
+            "date": run_date,
+            "packs": packs,
+            # [hash, pack index, offset, length, zdict version]; jobs are [head, body] blob indexes
+            "blobs": [[h, pack_pos[known[h][0]], *known[h][1:]] for h in payloads],
+            "jobs": [[blob_pos[h] if h else None for h in refs] for refs in jobs],
+        }
+        path = raw_dir / MANIFEST_DIR / MANIFEST_TEMPLATE.format(date=run_date)
+        tmp = path.with_suffix(".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump(manifest, f, separators=(",", ":"))
+        os.replace(tmp, path)
+    finally:
+        if own_conn:
+            conn.close()
+
+    logger.info(
+        f"Saved raw manifest to {path}: jobs={len(jobs)}, blobs={len(payloads)}, "
+        f"new_blobs={len(new_payloads)}, new_bytes={written}"
+    )
     return path
 
-def save_processed_parquet(records: list[dict], run_date: str) -> Path:
-    """Save normalized records as Parquet."""
+def load_raw_jobs(run_date: str, raw_dir: str | Path | None = None) -> list[dict]:
+    """Rebuild one day's raw job list from its manifest (or a legacy raw_jobs_{date}.json)."""
+    raw_dir = Path(raw_dir) if raw_dir is not None else RAW_DIR
+    path = raw_dir / MANIFEST_DIR / MANIFEST_TEMPLATE.format(date=run_date)
+    if not path.exists():
+        legacy = raw_dir / RAW_TEMPLATE.format(date=run_date)
+        with legacy.open("r", encoding="utf-8") as f:
+            return json.load(f)
+
+    with path.open("r", encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    parts = [None] * len(manifest["blobs"])
+    by_pack = {}
+    for i, (_, pack_idx, offset, length, zdict) in enumerate(manifest["blobs"]):
+        by_pack.setdefault(pack_idx, []).append((offset, length, zdict, i))
+    for pack_idx, entries in by_pack.items():
+        with (raw_dir / BLOB_DIR / manifest["packs"][pack_idx]).open("rb") as f:
+            for offset, length, zdict, i in sorted(entries):
+                f.seek(offset)
+                parts[i] = json.loads(_decompress_blob(f.read(length), zdict))
+
+    jobs = []
+    for head, body in manifest["jobs"]:
+        job = dict(parts[head])
+        if body is not None:
+            job.update(parts[body])
+        jobs.append(job)
+    return jobs
+
+def migrate_raw_json(raw_dir: str | Path | None = None, delete: bool = False) -> int:
+    """Move legacy raw_jobs_{date}.json files into the content-addressed store (oldest first)."""
+    raw_dir = Path(raw_dir) if raw_dir is not None else RAW_DIR
+    conn = open_blob_index()
+    migrated = 0
+    try:
+        for legacy in sorted(raw_dir.glob(RAW_TEMPLATE.format(date="*"))):
+            run_date = legacy.stem.removeprefix("raw_jobs_")
+            with legacy.open("r", encoding="utf-8") as f:
+                records = json.load(f)
+            save_raw_jobs(records, run_date, index_conn=conn, raw_dir=raw_dir)
+            if delete:
+                legacy.unlink()
+            migrated += 1
+    finally:
+        conn.close()
+    logger.info(f"Migrated {migrated} legacy raw JSON files into the blob store")
+    return migrated
+
+def save_processed_parquet(records: list[JobRecord], run_date: str) -> Path:
+    """Save normalized records as Parquet, converting and writing in bounded batches."""
     PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
     path = PROCESSED_DIR / PARQUET_TEMPLATE.format(date=run_date)
     
-    rows = [_to_parquet_row(r) for r in records]
-    table = pa.Table.from_pylist(rows)
-    pq.write_table(table, path)
+    with pq.ParquetWriter(path, PARQUET_SCHEMA) as writer:
+        for i in range(0, len(records), PARQUET_BATCH_ROWS):
+            writer.write_batch(_to_record_batch(records[i:i + PARQUET_BATCH_ROWS]))
     logger.info(f"Saved Parquet to {path}")
-    return path
\ No newline at end of file
+    return path
+
+def save_changes_parquet(
+    changes: list[tuple[JobRecord, list[str]]],
+    run_date: str,
+    run_id: str | None = None,
+) -> Path:
+    """
+    Save field-level diffs of changed postings (as returned by
+    upsert_and_filter_uniques) to this run's changes file. A same-day rerun
+    writes its own file; load_changes reads the whole day back.
+    """
+    CHANGES_DIR.mkdir(parents=True, exist_ok=True)
+    path = CHANGES_DIR / CHANGES_TEMPLATE.format(date=run_date, run=run_id or new_run_id())
+
+    rows = []
+    for record, changed in changes:
+        row = dict.fromkeys(CHANGES_SCHEMA.names)
+        row.update(job_key=record.job_key, scrape_date=record.scrape_date, job_id=record.job_id)
+        row["changed_fields"] = [f for f in CDC_FIELDS if f in changed]
+        for name in changed:
+            value = getattr(record, name)
+            row[name] = _nested_to_json(value) if name in NESTED_KEYS else value
+        rows.append(row)
+
+    tmp = path.with_suffix(".tmp")
+    pq.write_table(pa.Table.from_pylist(rows, schema=CHANGES_SCHEMA), tmp)
+    os.replace(tmp, path)
+    logger.info(f"Saved {len(changes)} changed postings to {path}")
+    return path
+
+def load_changes(run_date: str, changes_dir: str | Path | None = None) -> list[dict]:
+    """
+    Return one day's change rows, one per posting: changed fields are unioned
+    across the day's runs and the later run's value wins.
+    """
+    changes_dir = Path(changes_dir) if changes_dir is not None else CHANGES_DIR
+    rows = {}
+    # Run ids begin with the UTC start time, so name order is run order.
+    for path in sorted(changes_dir.glob(CHANGES_TEMPLATE.format(date=run_date, run="*"))):
+        for r in pq.read_table(path, schema=CHANGES_SCHEMA).to_pylist():
+            row = rows.setdefault(r["job_key"], dict.fromkeys(CHANGES_SCHEMA.names))
+            row.update(job_key=r["job_key"], scrape_date=r["scrape_date"], job_id=r["job_id"])
+            for name in r["changed_fields"]:
+                row[name] = r[name]
+            fields = set(r["changed_fields"]) | set(row["changed_fields"] or [])
+            row["changed_fields"] = [f for f in CDC_FIELDS if f in fields]
+    return list(rows.values())
+
+def main(argv: list[str] | None = None):
+    """CLI: `python -m source.storage --migrate-raw [--delete-legacy]`."""
+    parser = argparse.ArgumentParser(description="Raw store maintenance.")
+    parser.add_argument("--migrate-raw", action="store_true",
+                        help="Move legacy data/raw/raw_jobs_*.json into the blob store.")
+    parser.add_argument("--delete-legacy", action="store_true",
+                        help="Delete legacy JSON files after migrating them.")
+    args = parser.parse_args(argv)
+
+    if not args.migrate_raw:
+        parser.error("nothing to do (pass --migrate-raw)")
+    migrate_raw_json(delete=args.delete_legacy)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 from pathlib import Path
+from datetime import datetime, timezone
 import json
 
 from source.logger import get_logger
@@ -15,11 +16,15 @@ def build_run_summary(
     seen_stats: dict,
     carryover: int,
     total_seen: int = 0,
+    timings: dict | None = None,
+    started_at: str | None = None,
 ) -> dict:
     """Assemble a standardized daily run summary dictionary."""
     used = scrape_state.get("requests_used", 0)
     total_jobs = scrape_state.get("total_jobs", 0)
     inserted = seen_stats.get("inserted", 0)
+    uniques = seen_stats.get("uniques", inserted)
+    changed = seen_stats.get("changed", 0)
     touched = seen_stats.get("touched", 0)
     reason = scrape_state.get("reason", "n/a")
 
@@ -30,10 +35,14 @@ def build_run_summary(
         "stop_reason": reason,
         "total_jobs": total_jobs,
         "normalized": touched,
-        "uniques": inserted,
+        "uniques": uniques,
+        "changed": changed,
         "carryover": carryover,
         "remaining_after": remaining_after,
         "total_seen": total_seen,
+        "started_at": started_at,
+        "finished_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "timings": timings or {},
     }
     
 def print_run_summary(summary: dict):
@@ -48,13 +57,30 @@ def print_run_summary(summary: dict):
         f"jobs={summary.get('total_jobs')} "
         f"normalized={summary.get('normalized')} "
         f"uniques={summary.get('uniques')} "
+        f"changed={summary.get('changed')} "
         f"total_seen={summary.get('total_seen')} "
         f"carryover={summary.get('carryover')} "
+        f"total_s={(summary.get('timings') or {}).get('total_s')} "
     )
     
-def format_summary_for_telegram(summary: dict) -> str:
-    """Return a compact Telegram-friendly summary message."""
+def _signed(n) -> str:
+    return "n/a" if n is None else f"{n:+d}"
+
+def format_trends(trends: dict) -> str:
+    """Return rolling-window and weekday lines for the Telegram summary."""
+    weekday = " ".join(
+        f"{day} {avg:g}" for day, avg in trends["weekday_yield"].items() if avg is not None
+    )
     return (
+        f"New roles, 7d: {trends['last_7']['uniques']} ({_signed(trends['delta_7'])} vs prior 7d)\n"
+        f"New roles, 30d: {trends['last_30']['uniques']} ({_signed(trends['delta_30'])} vs prior 30d)\n"
+        f"Requests, 30d: {trends['last_30']['requests_used']}\n"
+        f"Avg new roles by weekday: {weekday or 'n/a'}\n"
+    )
+
+def format_summary_for_telegram(summary: dict, trends: dict | None = None) -> str:
+    """Return a compact Telegram-friendly summary message, with trend lines if given."""
+    text = (
         f"*Job Tracker — Daily Run*\n"
         f"Date: {summary.get('date')}\n"
         f"Cap: {summary.get('cap')}\n"
@@ -64,13 +90,17 @@ def format_summary_for_telegram(summary: dict) -> str:
         f"Jobs scraped: {summary.get('total_jobs')}\n"
         f"Normalized: {summary.get('normalized')}\n"
         f"Uniques stored: {summary.get('uniques')}\n"
+        f"Changed postings: {summary.get('changed', 0)}\n"
         f"Total seen overall: {summary.get('total_seen')}\n"
         f"Carryover to tomorrow: {summary.get('carryover')}\n"
     )
+    if trends:
+        text += "\n" + format_trends(trends)
+    return text
     
 def save_summary_json(summary: dict):
     """
-    Save the run summary as JSON for the README stats updater.
+    Save the latest run summary as JSON (a snapshot only; trends come from run history).
     """
     SUMMARY_JSON.parent.mkdir(parents=True, exist_ok=True)
     with SUMMARY_JSON.open("w", encoding="utf-8") as f:
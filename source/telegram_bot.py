@@ -1,11 +1,27 @@
+from pathlib import Path
+import json
 import os
+import queue
+import threading
+import time
 import requests
 
 from source.logger import get_logger
+from source.records import JobRecord
 
 logger = get_logger()
 
 TELEGRAM_URL = "https://api.telegram.org/bot{token}/sendMessage"
+OUTBOX_PATH = Path("data/state/telegram_outbox.json")
+
+MAX_MESSAGE_CHARS = 4096
+MIN_SEND_INTERVAL = 1.1     # Telegram allows ~1 message/second per chat
+MAX_ATTEMPTS = 5
+MAX_OUTBOX = 200            # oldest pending messages are dropped beyond this
+
+
+def _get_credentials() -> tuple[str | None, str | None]:
+    return os.getenv("TELEGRAM_BOT_TOKEN"), os.getenv("TELEGRAM_CHAT_ID")
 
 
 def send_telegram_message(text: str):
@@ -13,8 +29,7 @@ def send_telegram_message(text: str):
     Send a plain-text Telegram message using the bot API.
     Silently no-ops if no token or chat_id is configured.
     """
-    token = os.getenv("TELEGRAM_BOT_TOKEN")
-    chat_id = os.getenv("TELEGRAM_CHAT_ID")
+    token, chat_id = _get_credentials()
 
     if not token or not chat_id:
         logger.info(
@@ -30,4 +45,180 @@ def send_telegram_message(text: str):
         r.raise_for_status()
         logger.info("Telegram message sent.")
     except Exception as e:
-        logger.warning(f"Failed to send Telegram message: {e}")
\ No newline at end of file
+        logger.warning(f"Failed to send Telegram message: {e}")
+
+
+def format_job_alerts(uniques: list[JobRecord], limit: int = MAX_MESSAGE_CHARS) -> list[str]:
+    """Coalesce per-job alert lines (title, company, link) into messages under `limit` chars."""
+    entries = []
+    for rec in uniques:
+        line = f"• {rec.get('title')} — {rec.get('company')}"
+        if rec.get("google_share_url"):
+            line += f"\n{rec['google_share_url']}"
+        entries.append(line[:limit - 100])
+
+    messages = []
+    current = []
+    size = 0
+    for entry in entries:
+        # +2 for the blank line between entries, 100 chars reserved for the header
+        if current and size + len(entry) + 2 > limit - 100:
+            messages.append(current)
+            current, size = [], 0
+        current.append(entry)
+        size += len(entry) + 2
+
+    if current:
+        messages.append(current)
+
+    total = len(messages)
+    return [
+        f"New roles ({len(uniques)})" + (f" [{i}/{total}]" if total > 1 else "") + "\n\n" + "\n\n".join(chunk)
+        for i, chunk in enumerate(messages, start=1)
+    ]
+
+
+def _load_outbox(path: Path) -> list[str]:
+    if not path.exists():
+        return []
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            pending = json.load(f)
+        return [m for m in pending if isinstance(m, str)]
+    except Exception as e:
+        logger.warning(f"Failed to load Telegram outbox {path}: {e}")
+        return []
+
+
+def _save_outbox(path: Path, pending: list[str]):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if not pending:
+        path.unlink(missing_ok=True)
+        return
+    pending = pending[-MAX_OUTBOX:]
+    tmp = path.with_suffix(".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump(pending, f, ensure_ascii=False)
+    os.replace(tmp, path)
+    logger.info(f"Persisted {len(pending)} undelivered Telegram messages to {path}")
+
+
+class TelegramQueue:
+    """
+    Background sender for Telegram messages.
+
+    `enqueue` never blocks: messages are delivered by a worker thread that
+    spaces sends per chat, honors 429 `retry_after`, and retries transient
+    errors. Messages left over from a previous run's outbox are sent first;
+    anything still undelivered at `close` is written back to the outbox.
+    """
+
+    def __init__(self, outbox_path: str | Path = OUTBOX_PATH):
+        self.outbox_path = Path(outbox_path)
+        self.token, self.chat_id = _get_credentials()
+        self.enabled = bool(self.token and self.chat_id)
+        self._queue: queue.Queue = queue.Queue()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._undelivered: list[str] = []
+        self._next_send_at = 0.0
+        self.sent = 0
+
+    def start(self) -> "TelegramQueue":
+        if not self.enabled:
+            logger.info("Telegram disabled (missing TELEGRAM_BOT_TOKEN or TELEGRAM_CHAT_ID).")
+            return self
+        pending = _load_outbox(self.outbox_path)
+        if pending:
+            logger.info(f"Resending {len(pending)} Telegram messages from outbox")
+        for text in pending:
+            self._queue.put(text)
+        self._thread = threading.Thread(target=self._run, name="telegram-queue", daemon=True)
+        self._thread.start()
+        return self
+
+    def enqueue(self, text: str):
+        """Queue one message for delivery (split if longer than Telegram allows)."""
+        if not self.enabled or not text:
+            return
+        for i in range(0, len(text), MAX_MESSAGE_CHARS):
+            self._queue.put(text[i:i + MAX_MESSAGE_CHARS])
+
+    def close(self, timeout: float = 60.0):
+        """Wait up to `timeout` seconds for delivery, then persist whatever is left."""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning(f"Telegram queue not drained after {timeout}s; persisting the rest.")
+            self._stop.set()
+            self._thread.join(15)
+
+        while True:
+            try:
+                text = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if text is not None:
+                self._undelivered.append(text)
+
+        _save_outbox(self.outbox_path, self._undelivered)
+        logger.info(f"Telegram queue closed: sent={self.sent}, undelivered={len(self._undelivered)}")
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            text = self._queue.get()
+            if text is None:
+                return
+            if self._deliver(text):
+                continue
+            self._undelivered.append(text)
+
+    def _deliver(self, text: str) -> bool:
+        """
+        Send one message. Returns True once it is sent or permanently rejected,
+        False if it should be kept for a later run.
+        """
+        url = TELEGRAM_URL.format(token=self.token)
+        payload = {"chat_id": self.chat_id, "text": text}
+
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            wait = self._next_send_at - time.monotonic()
+            if wait > 0 and self._stop.wait(wait):
+                return False
+            self._next_send_at = time.monotonic() + MIN_SEND_INTERVAL
+
+            try:
+                r = requests.post(url, json=payload, timeout=10)
+            except requests.RequestException as e:
+                logger.warning(f"Telegram send failed (attempt {attempt}/{MAX_ATTEMPTS}): {e}")
+                if self._stop.wait(2 ** attempt):
+                    return False
+                continue
+
+            if r.status_code == 429:
+                try:
+                    retry_after = float(r.json().get("parameters", {}).get("retry_after", 1))
+                except ValueError:
+                    retry_after = 1.0
+                logger.warning(f"Telegram rate limited; retrying after {retry_after}s")
+                if self._stop.wait(retry_after):
+                    return False
+                continue
+
+            if r.status_code >= 500:
+                logger.warning(f"Telegram server error {r.status_code} (attempt {attempt}/{MAX_ATTEMPTS})")
+                if self._stop.wait(2 ** attempt):
+                    return False
+                continue
+
+            if not r.ok:
+                logger.warning(f"Telegram rejected message ({r.status_code}): {r.text[:200]}; dropping it.")
+                return True
+
+            self.sent += 1
+            return True
+
+        return False
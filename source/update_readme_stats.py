@@ -5,6 +5,8 @@ from datetime import datetime
 from zoneinfo import ZoneInfo
 
 from source.logger import get_logger
+from source.run_history import open_history_db, get_latest_run, compute_trends
+from source.policies import WEEKDAY_NAMES
 
 logger = get_logger()
 
@@ -35,7 +37,38 @@ def _format_last_run_nyc() -> str:
     return dt.strftime("%b %d, %Y at %I:%M %p %Z")
 
 
-def _build_stats_block(summary: dict) -> str:
+def load_history() -> tuple[dict | None, dict | None]:
+    """Return (latest run, trends) from the run-history store, or (None, None) if empty."""
+    conn = open_history_db()
+    try:
+        latest = get_latest_run(conn)
+        if latest is None:
+            return None, None
+        return latest, compute_trends(conn, latest["date"])
+    finally:
+        conn.close()
+
+
+def _delta(n) -> str:
+    return "" if n is None else f" ({n:+d} vs prior)"
+
+
+def _build_trend_rows(trends: dict) -> str:
+    """Build the rolling-window rows and weekday-yield table for the stats block."""
+    weekday = trends["weekday_yield"]
+    return (
+        f"| New roles, last 7 days  | {trends['last_7']['uniques']}{_delta(trends['delta_7'])} |\n"
+        f"| New roles, last 30 days | {trends['last_30']['uniques']}{_delta(trends['delta_30'])} |\n"
+        f"| Jobs collected, 30 days | {trends['last_30']['total_jobs']} |\n"
+        "\n"
+        "**Average new roles per run by weekday (last 8 weeks)**\n\n"
+        "| " + " | ".join(WEEKDAY_NAMES) + " |\n"
+        "|" + "-----|" * len(WEEKDAY_NAMES) + "\n"
+        "| " + " | ".join("—" if weekday[d] is None else f"{weekday[d]:g}" for d in WEEKDAY_NAMES) + " |\n"
+    )
+
+
+def _build_stats_block(summary: dict, trends: dict | None = None) -> str:
     """Build the Markdown block for the Daily Stats section."""
     last_run = _format_last_run_nyc()
     total_seen = summary.get("total_seen", "—")
@@ -45,23 +78,24 @@ def _build_stats_block(summary: dict) -> str:
     return (
         "<!-- STATS_START -->\n"
         f"**Last run:** {last_run}  \n\n"
-        "| Metric                 | Value |\n"
-        "|------------------------|-------|\n"
-        f"| Total jobs tracked     | {total_seen} |\n"
-        f"| Jobs collected today   | {total_jobs} |\n"
-        f"| New unique roles today | {uniques} |\n"
-        "<!-- STATS_END -->"
+        "| Metric                  | Value |\n"
+        "|-------------------------|-------|\n"
+        f"| Total jobs tracked      | {total_seen} |\n"
+        f"| Jobs collected today    | {total_jobs} |\n"
+        f"| New unique roles today  | {uniques} |\n"
+        + (_build_trend_rows(trends) if trends else "")
+        + "<!-- STATS_END -->"
     )
 
 
-def update_readme(summary: dict) -> bool:
+def update_readme(summary: dict, trends: dict | None = None) -> bool:
     """Replace the Daily Stats block in README.md with fresh values."""
     if not README_PATH.exists():
         logger.error("README.md not found, skipping stats update.")
         return False
 
     text = README_PATH.read_text(encoding="utf-8")
-    stats_block = _build_stats_block(summary)
+    stats_block = _build_stats_block(summary, trends)
 
     start_tag = "<!-- STATS_START -->"
     end_tag = "<!-- STATS_END -->"
@@ -82,11 +116,13 @@ def update_readme(summary: dict) -> bool:
 
 
 def main():
-    """Entry point for updating README stats from the last run summary."""
-    summary = load_summary()
+    """Entry point for updating README stats from run history (last summary JSON as fallback)."""
+    summary, trends = load_history()
+    if summary is None:
+        summary = load_summary()
     if not summary:
         return
-    update_readme(summary)
+    update_readme(summary, trends)
 
 
 if __name__ == "__main__":